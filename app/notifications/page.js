@@ -8,6 +8,13 @@ import Link from 'next/link';
 import NotificationItem from '../components/NotificationItem';
 import TopBar from '../components/TopBar';
 
+// The backend stops counting unread notifications at this value
+const UNREAD_COUNT_LIMIT = 100;
+
+// At the cap the real total is unknown, so it is kept until the next fetch
+const decrementUnread = (count) =>
+  count >= UNREAD_COUNT_LIMIT ? count : Math.max(0, count - 1);
+
 export default function NotificationsPage() {
   const { user, token, getAuthHeaders } = useAuth();
   const router = useRouter();
@@ -75,7 +82,7 @@ export default function NotificationsPage() {
               : notif
           )
         );
-        setUnreadCount(prev => Math.max(0, prev - 1));
+        setUnreadCount(decrementUnread);
       }
     } catch (error) {
       console.error('Failed to mark notification as read:', error);
@@ -92,7 +99,7 @@ export default function NotificationsPage() {
       if (response.ok) {
         const notification = notifications.find(n => n.id === notificationId);
         if (notification && !notification.is_read) {
-          setUnreadCount(prev => Math.max(0, prev - 1));
+          setUnreadCount(decrementUnread);
         }
         setNotifications(prev => prev.filter(n => n.id !== notificationId));
       }
@@ -160,7 +167,7 @@ export default function NotificationsPage() {
                   : 'text-white/80 hover:text-white'
               }`}
             >
-              Belum Dibaca ({unreadCount})
+              Belum Dibaca ({unreadCount >= UNREAD_COUNT_LIMIT ? `${UNREAD_COUNT_LIMIT}+` : unreadCount})
             </button>
           </div>
 
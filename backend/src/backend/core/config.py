@@ -24,6 +24,8 @@ class Settings:
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "")
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Window in which an identical token request returns the token already issued
+    JWT_TOKEN_REUSE_SECONDS: int = int(os.getenv("JWT_TOKEN_REUSE_SECONDS", "60"))
 
     # Admin and payouts
     ADMIN_EMAILS: str = os.getenv("ADMIN_EMAILS", "")  # comma-separated
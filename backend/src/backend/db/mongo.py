@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
 from pymongo.server_api import ServerApi
 from ..core.config import get_settings
 import asyncio
@@ -58,6 +59,68 @@ async def ensure_connection(max_retries: int = 3) -> AsyncIOMotorDatabase:
     raise RuntimeError("MongoDB connection unavailable after retries")
 
 
+# Secondary indexes used by hot query paths, as (collection, keys, options)
+_INDEXES = (
+    # Paginated transaction history: filter by user, newest first, with _id
+    # as the keyset tie-breaker
+    ("transactions",
+     [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+     {"name": "user_id_1_created_at_-1__id_-1"}),
+    # Infoin articles: slug lookups (and the seed upserts keyed by slug), plus
+    # newest-first listings with and without the published filter
+    ("educational_contents", [("slug", ASCENDING)], {"name": "slug_1", "unique": True}),
+    ("educational_contents", [("created_at", DESCENDING)], {"name": "created_at_-1"}),
+    ("educational_contents",
+     [("is_published", ASCENDING), ("created_at", DESCENDING)],
+     {"name": "is_published_1_created_at_-1_published",
+      "partialFilterExpression": {"is_published": True}}),
+    # ESP32 audit log: per-device history, newest first
+    ("esp32_logs",
+     [("device_id", ASCENDING), ("timestamp", DESCENDING)],
+     {"name": "device_id_1_timestamp_-1"}),
+    # Device command polling: pending commands for one device, newest first
+    ("esp32_commands",
+     [("device_id", ASCENDING), ("status", ASCENDING), ("timestamp", DESCENDING)],
+     {"name": "device_id_1_status_1_timestamp_-1"}),
+    # Notification inbox: a user's notifications (optionally unread only),
+    # newest first, plus the unread count
+    ("notifications",
+     [("user_id", ASCENDING), ("is_read", ASCENDING), ("created_at", DESCENDING)],
+     {"name": "user_id_1_is_read_1_created_at_-1"}),
+    ("notifications",
+     [("user_id", ASCENDING), ("created_at", DESCENDING)],
+     {"name": "user_id_1_created_at_-1"}),
+    # One settings document per user; older documents stored without a
+    # user_id are left out of the uniqueness check
+    ("notification_settings", [("user_id", ASCENDING)],
+     {"name": "user_id_1", "unique": True,
+      "partialFilterExpression": {"user_id": {"$exists": True}}}),
+)
+
+
+async def ensure_indexes() -> None:
+    """Create the secondary indexes used by hot query paths.
+
+    ``create_index`` is idempotent, so this is safe to run on every startup.
+    Each index is created independently: one that cannot be built (e.g. a
+    unique index over existing duplicates) is logged and the rest still are.
+    """
+    db = await ensure_connection()
+    results = await asyncio.gather(
+        *(db[collection].create_index(keys, **options) for collection, keys, options in _INDEXES),
+        return_exceptions=True,
+    )
+    failed = 0
+    for (collection, _, options), result in zip(_INDEXES, results):
+        if isinstance(result, Exception):
+            failed += 1
+            logger.warning("Failed to create index %s.%s: %s", collection, options["name"], result)
+    if failed:
+        logger.warning("%d of %d MongoDB indexes could not be created", failed, len(_INDEXES))
+    else:
+        logger.info("✅ MongoDB indexes ensured")
+
+
 def get_database() -> AsyncIOMotorDatabase:
     if mongo_db is None:
         raise RuntimeError("MongoDB not initialized. Call connect_to_mongo() first.")
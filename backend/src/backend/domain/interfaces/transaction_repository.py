@@ -23,7 +23,8 @@ class TransactionRepository(Protocol):
         self, 
         user_id: str, 
         limit: int = 20, 
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[str] = None
     ) -> List[Transaction]:
         """Get transactions for a specific user with pagination."""
         ...
@@ -23,7 +23,8 @@ class TransactionService(Protocol):
         self, 
         user_id: str, 
         limit: int = 20, 
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[str] = None
     ) -> List[TransactionResponse]:
         """Get paginated transaction history for a user."""
         ...
@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import logging
 import os
 
 from .routers import health, scan, ws, auth, notification, statistics, educational, transactions, esp32, qr_code
@@ -9,21 +10,31 @@ from .routers.payout import router as payout_router
 from .routers.rag import router as rag_router
 from .routers.admin import router as admin_router
 from pathlib import Path
-from .db.mongo import connect_to_mongo, close_mongo_connection
+from .db.mongo import connect_to_mongo, close_mongo_connection, ensure_indexes
 from .services.ws_manager import start_websocket_manager, stop_websocket_manager
-from .services.educational_service import EducationalService
+from .services.educational_service import get_educational_service
+from .services.iot_client import close_http_client
+from .services.esp32_log_writer import stop_esp32_log_writer
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
+    try:
+        await ensure_indexes()
+    except Exception as exc:
+        logger.warning("Failed to ensure MongoDB indexes: %s", exc)
     await start_websocket_manager()
     try:
-        await EducationalService().seed_initial_education_contents()
+        await get_educational_service().seed_initial_education_contents()
     except Exception:
         pass
     yield
     await stop_websocket_manager()
+    await close_http_client()
+    await stop_esp32_log_writer()
     await close_mongo_connection()
 
 
@@ -29,3 +29,12 @@ class EducationalContent(MongoBaseModel):
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @classmethod
+    def from_db(cls, doc: dict) -> "EducationalContent":
+        """Build from a stored (already normalised) document without re-validating it.
+
+        Documents were validated on write; responses are validated again at the
+        API boundary, so reads skip the model validators.
+        """
+        return cls.model_construct(**doc)
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Literal
 from pydantic import Field
 
 from .common import MongoBaseModel, PyObjectId
 
 
+@lru_cache(maxsize=None)
+def quiet_hours_mask(start: int, end: int) -> int:
+    """24-bit mask with bit ``h`` set when UTC hour ``h`` is quiet.
+
+    Both ends are inclusive and the window may wrap past midnight
+    (e.g. 22 -> 7 covers 22:00-07:59).
+    """
+    if start <= end:
+        hours = range(start, end + 1)
+    else:
+        hours = [*range(start, 24), *range(0, end + 1)]
+    return sum(1 << hour for hour in hours)
+
+
 class Notification(MongoBaseModel):
     """Notification model for various system notifications."""
     
@@ -50,3 +65,8 @@ class NotificationSettings(MongoBaseModel):
     # Quiet hours (24-hour format)
     quiet_hours_start: int = Field(default=22, ge=0, le=23)  # 10 PM
     quiet_hours_end: int = Field(default=7, ge=0, le=23)    # 7 AM
+    
+    @property
+    def quiet_mask(self) -> int:
+        """Quiet hours as a bitmask; see ``quiet_hours_mask``."""
+        return quiet_hours_mask(self.quiet_hours_start, self.quiet_hours_end)
@@ -35,7 +35,6 @@ class QRCode(BaseModel):
     class Config:
         populate_by_name = True
         json_encoders = {ObjectId: str}
-        allow_population_by_field_name = True
         arbitrary_types_allowed = True
 
 
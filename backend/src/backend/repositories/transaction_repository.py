@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
 import logging
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Tuple
 from bson import ObjectId
+from bson.errors import InvalidId
 
 from motor.motor_asyncio import AsyncIOMotorCollection
 
@@ -15,6 +19,25 @@ from src.backend.db.mongo import ensure_connection
 logger = logging.getLogger(__name__)
 
 
+def encode_transaction_cursor(created_at: str, transaction_id: str) -> str:
+    """Encode a keyset pagination cursor from the last returned transaction."""
+    raw = f"{created_at}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_transaction_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a cursor produced by ``encode_transaction_cursor``.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, transaction_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), ObjectId(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, InvalidId, ValueError) as e:
+        raise ValueError("Invalid transaction cursor") from e
+
+
 class MongoDBTransactionRepository(TransactionRepository):
     """MongoDB implementation of transaction repository."""
     
@@ -91,17 +114,35 @@ class MongoDBTransactionRepository(TransactionRepository):
         self, 
         user_id: str, 
         limit: int = 20, 
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[str] = None
     ) -> List[Transaction]:
-        """Get transactions for a specific user with pagination."""
+        """Get transactions for a specific user with pagination.
+
+        When ``after`` is given, keyset pagination on ``(created_at, _id)`` is
+        used and ``offset`` is ignored.
+        """
         try:
             collection = await self._get_collection()
             
             # Convert string ID to ObjectId
             object_id = ObjectId(user_id)
+            query: dict = {"user_id": object_id}
+            
+            if after:
+                # Seek past the cursor instead of skipping documents
+                cursor_created_at, cursor_id = decode_transaction_cursor(after)
+                query["$or"] = [
+                    {"created_at": {"$lt": cursor_created_at}},
+                    {"created_at": cursor_created_at, "_id": {"$lt": cursor_id}},
+                ]
+                offset = 0
             
             # Find transactions for user with pagination
-            cursor = collection.find({"user_id": object_id}).sort("created_at", -1).skip(offset).limit(limit)
+            cursor = collection.find(query).sort([("created_at", -1), ("_id", -1)])
+            if offset:
+                cursor = cursor.skip(offset)
+            cursor = cursor.limit(limit)
             
             transactions = []
             async for transaction_doc in cursor:
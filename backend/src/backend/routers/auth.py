@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import time
+
 import httpx
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
+import orjson
 
 from ..core.config import get_settings
 from ..models.user import User
@@ -18,24 +23,97 @@ security = HTTPBearer()
 
 settings = get_settings()
 
+# Signing parameters resolved once; PyJWT takes the HMAC key as bytes
+_JWT_SECRET = settings.JWT_SECRET_KEY.encode()
+_JWT_ALGORITHM = settings.JWT_ALGORITHM
+_JWT_ALGORITHMS = [_JWT_ALGORITHM]
+_ACCESS_TOKEN_TTL_SECONDS = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# Recently issued default-lifetime tokens keyed by their claims: (token, issued_at).
+# Reusing a token inside JWT_TOKEN_REUSE_SECONDS skips signing during login or
+# refresh bursts while keeping refreshed expiries within that window of fresh.
+_ISSUED_TOKEN_CACHE_MAX = 4096
+_issued_tokens: Dict[Tuple[Tuple[str, Any], ...], Tuple[str, float]] = {}
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
+    reuse_key = None
+    if expires_delta is None and settings.JWT_TOKEN_REUSE_SECONDS > 0:
+        reuse_key = tuple(sorted(data.items()))
+        entry = _issued_tokens.get(reuse_key)
+        if entry is not None and time.monotonic() - entry[1] < settings.JWT_TOKEN_REUSE_SECONDS:
+            return entry[0]
+    
     to_encode = data.copy()
+    # PyJWT accepts integer claims, so skip building timezone-aware datetimes
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        ttl_seconds = int(expires_delta.total_seconds())
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+        ttl_seconds = _ACCESS_TOKEN_TTL_SECONDS
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    to_encode.update({"exp": int(time.time()) + ttl_seconds})
+    encoded_jwt = jwt.encode(to_encode, _JWT_SECRET, algorithm=_JWT_ALGORITHM)
+    if reuse_key is not None:
+        if len(_issued_tokens) >= _ISSUED_TOKEN_CACHE_MAX:
+            _issued_tokens.clear()
+        _issued_tokens[reuse_key] = (encoded_jwt, time.monotonic())
     return encoded_jwt
 
 
+# Verified payloads keyed by token digest: (payload, expires_at). Entries lapse
+# slightly before the token's own exp so a cached hit is never an expired token.
+_TOKEN_CACHE_TTL_SECONDS = 300
+_TOKEN_CACHE_EXP_SKEW_SECONDS = 30
+_TOKEN_CACHE_MAX = 4096
+_token_cache: Dict[str, Tuple[dict, float]] = {}
+
+
+def _unverified_exp(token: str) -> Any:
+    """Read ``exp`` from the token's payload segment with orjson, without verifying it."""
+    try:
+        segment = token.split(".", 2)[1]
+        claims = orjson.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+    except (IndexError, ValueError) as e:
+        raise jwt.DecodeError("Invalid token payload") from e
+    if not isinstance(claims, dict):
+        raise jwt.DecodeError("Invalid token payload")
+    return claims.get("exp")
+
+
+def _decode_token_cached(token: str) -> dict:
+    """Decode ``token``, reusing the payload of an earlier successful verification."""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    now = time.time()
+    entry = _token_cache.get(key)
+    if entry is not None:
+        if entry[1] > now:
+            return dict(entry[0])
+        _token_cache.pop(key, None)
+    
+    # Malformed and expired tokens are rejected from the unverified claims
+    # before paying for signature verification
+    exp = _unverified_exp(token)
+    if isinstance(exp, (int, float)) and exp <= now:
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    
+    # Failures raise before anything is cached
+    payload = jwt.decode(token, _JWT_SECRET, algorithms=_JWT_ALGORITHMS)
+    expires_at = now + _TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, exp - _TOKEN_CACHE_EXP_SKEW_SECONDS)
+    if expires_at > now:
+        if len(_token_cache) >= _TOKEN_CACHE_MAX:
+            _token_cache.clear()
+        _token_cache[key] = (payload, expires_at)
+    return dict(payload)
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Verify JWT token and return payload"""
     try:
-        payload = jwt.decode(credentials.credentials, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
+        return _decode_token_cached(credentials.credentials)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError as e:
@@ -232,7 +310,7 @@ async def update_profile(
     user_id = ObjectId(payload["sub"])
 
     # Check if user exists
-    existing_user = await users_collection.find_one({"_id": user_id})
+    existing_user = await users_collection.find_one({"_id": user_id}, {"_id": 1})
     if not existing_user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from bson import ObjectId
 
-from ..services.educational_service import EducationalService
+from ..services.educational_service import get_educational_service
 from ..schemas.educational import (
     EducationalCreate,
     EducationalResponse,
@@ -14,7 +14,12 @@ from .auth import verify_token  # assuming verify_token returns payload dict
 
 router = APIRouter(prefix="/education", tags=["education"])
 
-service = EducationalService()
+service = get_educational_service()
+
+
+def _json_response(model: EducationalResponse | EducationalListResponse) -> Response:
+    """Serialise an already-validated response model in pydantic-core."""
+    return Response(model.model_dump_json(), media_type="application/json")
 
 
 @router.get("/", response_model=EducationalListResponse)
@@ -40,7 +45,7 @@ async def list_contents(limit: int = Query(50, ge=1, le=100), category: str | No
         else:
             data["id"] = str(data.get("id"))
         items.append(EducationalResponse.model_validate(data))
-    return EducationalListResponse(items=items, total=len(items))
+    return _json_response(EducationalListResponse(items=items, total=len(items)))
 
 
 @router.get("/{content_id}", response_model=EducationalResponse)
@@ -54,7 +59,7 @@ async def get_content(content_id: str):
         data["id"] = str(data.pop("_id"))
     else:
         data["id"] = str(data.get("id"))
-    return EducationalResponse.model_validate(data)
+    return _json_response(EducationalResponse.model_validate(data))
 
 
 @router.get("/slug/{slug}", response_model=EducationalResponse)
@@ -68,7 +73,7 @@ async def get_content_by_slug(slug: str):
         data["id"] = str(data.pop("_id"))
     else:
         data["id"] = str(data.get("id"))
-    return EducationalResponse.model_validate(data)
+    return _json_response(EducationalResponse.model_validate(data))
 
 
 @router.post("/", response_model=EducationalResponse, status_code=status.HTTP_201_CREATED)
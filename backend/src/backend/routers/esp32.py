@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timezone
 from fastapi import APIRouter, HTTPException, status, Query, BackgroundTasks
 from pydantic import BaseModel
@@ -11,6 +12,7 @@ from ..db.mongo import ensure_connection
 from ..services.ws_manager import manager
 from ..services.iot_client import SmartBinClient
 from bson import ObjectId
+from pymongo import WriteConcern
 
 router = APIRouter(prefix="/api/esp32", tags=["esp32"])
 logger = logging.getLogger(__name__)
@@ -18,6 +20,31 @@ logger = logging.getLogger(__name__)
 # Global state for ESP32 connections (in production, use Redis/database)
 esp32_connections: Dict[str, Dict[str, Any]] = {}
 
+# Devices poll /commands/{device_id} continuously; answers are reused for a
+# short window and dropped whenever this process queues or completes a command
+_PENDING_COMMANDS_TTL_SECONDS = 2.0
+_PENDING_COMMANDS_CACHE_MAX = 10_000
+_pending_commands_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+
+
+# Audit-log writes only need the primary's acknowledgement, not the
+# connection-string default of w=majority; w=1 keeps the lid sequence's
+# follow-up updates ordered after the insert they target
+_AUDIT_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+
+def _audit_logs(db):
+    """Return the esp32_logs collection with the audit-log write concern."""
+    return db["esp32_logs"].with_options(write_concern=_AUDIT_WRITE_CONCERN)
+
+
+def _invalidate_pending_commands(device_id: Optional[str] = None) -> None:
+    """Forget cached pending commands for one device, or for all devices."""
+    if device_id is None:
+        _pending_commands_cache.clear()
+    else:
+        _pending_commands_cache.pop(device_id, None)
+
 class ESP32Registration(BaseModel):
     device_id: str
     firmware_version: Optional[str] = None
@@ -111,7 +138,7 @@ async def update_esp32_status(status_update: ESP32Status, background_tasks: Back
 
         # Log to database
         db = await ensure_connection()
-        await db["esp32_logs"].insert_one({
+        await _audit_logs(db).insert_one({
             "device_id": device_id,
             "action": "status_update",
             "status": status_update.status,
@@ -151,6 +178,10 @@ async def control_lid(request: LidControlRequest, background_tasks: BackgroundTa
         device_id = request.device_id
         action = request.action
 
+        # Lid actions need a registered device; fail before writing anything
+        if action in ("open", "close") and device_id not in esp32_connections:
+            raise HTTPException(status_code=404, detail=f"Device {device_id} not registered")
+
         # Log the action
         db = await ensure_connection()
         action_log = {
@@ -161,7 +192,7 @@ async def control_lid(request: LidControlRequest, background_tasks: BackgroundTa
             "details": {"duration_seconds": request.duration_seconds}
         }
 
-        log_result = await db["esp32_logs"].insert_one(action_log)
+        log_result = await _audit_logs(db).insert_one(action_log)
         action_id = str(log_result.inserted_id)
         logger.info("Created action log with ID: %s", action_id)
 
@@ -185,7 +216,7 @@ async def control_lid(request: LidControlRequest, background_tasks: BackgroundTa
 
         else:
             # Update log as error
-            await db["esp32_logs"].update_one(
+            await _audit_logs(db).update_one(
                 {"_id": ObjectId(action_id)},
                 {"$set": {"status": "error", "error_message": f"Unknown action: {action}"}}
             )
@@ -311,6 +342,7 @@ async def create_manual_command(request: ManualCommandRequest):
 
         result = await db["esp32_commands"].insert_one(command_data)
         command_id = str(result.inserted_id)
+        _invalidate_pending_commands(request.device_id)
 
         logger.info("Manual command created: %s for device %s", request.action, request.device_id)
 
@@ -330,6 +362,10 @@ async def create_manual_command(request: ManualCommandRequest):
 @router.get("/commands/{device_id}", response_model=List[Dict[str, Any]])
 async def get_pending_commands(device_id: str):
     """Get pending commands for ESP32 to execute (polling approach)."""
+    cached = _pending_commands_cache.get(device_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     try:
         db = await ensure_connection()
 
@@ -347,6 +383,9 @@ async def get_pending_commands(device_id: str):
             command["timestamp"] = command["timestamp"].isoformat()
             commands.append(command)
 
+        if len(_pending_commands_cache) >= _PENDING_COMMANDS_CACHE_MAX:
+            _pending_commands_cache.clear()
+        _pending_commands_cache[device_id] = (time.monotonic() + _PENDING_COMMANDS_TTL_SECONDS, commands)
         return commands
 
     except Exception as exc:
@@ -367,6 +406,9 @@ async def mark_command_complete(command_id: str):
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Command not found")
 
+        # The completing device is not known from the command id alone
+        _invalidate_pending_commands()
+
         return {"message": "Command marked as completed"}
 
     except HTTPException:
@@ -391,12 +433,24 @@ async def queue_command_for_esp32(device_id: str, action: str, duration_seconds:
         }
 
         await db["esp32_commands"].insert_one(command_data)
+        _invalidate_pending_commands(device_id)
         logger.info("Command queued for ESP32 %s: %s", device_id, action)
 
     except Exception as exc:
         logger.error("Failed to queue command for %s: %s", device_id, exc)
         raise
 
+async def _mark_action_error(action_id: str, exc: Exception) -> None:
+    """Record a failed lid action; a failure to log is reported, not raised."""
+    try:
+        db = await ensure_connection()
+        await _audit_logs(db).update_one(
+            {"_id": ObjectId(action_id)},
+            {"$set": {"status": "error", "error_message": str(exc)}}
+        )
+    except Exception as log_exc:  # noqa: BLE001
+        logger.warning("Failed to record error for action %s: %s", action_id, log_exc)
+
 # Background task handlers
 async def handle_lid_open_sequence(device_id: str, action: str, duration_seconds: int, action_id: str):
     """Handle the lid open sequence: open -> wait -> close."""
@@ -406,7 +460,7 @@ async def handle_lid_open_sequence(device_id: str, action: str, duration_seconds
 
         # Update initial action as in progress
         logger.info("Updating action %s to in_progress", action_id)
-        await db["esp32_logs"].update_one(
+        await _audit_logs(db).update_one(
             {"_id": ObjectId(action_id)},
             {"$set": {"status": "in_progress", "details.sequence": "opening"}}
         )
@@ -454,7 +508,7 @@ async def handle_lid_open_sequence(device_id: str, action: str, duration_seconds
             events = [{"event": "command_queued", "status": "success"}]
 
         # Update as lid opened
-        await db["esp32_logs"].update_one(
+        await _audit_logs(db).update_one(
             {"_id": ObjectId(action_id)},
             {"$set": {"status": "in_progress", "details.sequence": "opened", "hardware_events": events}}
         )
@@ -476,7 +530,7 @@ async def handle_lid_open_sequence(device_id: str, action: str, duration_seconds
         await asyncio.sleep(duration_seconds)
 
         # Update as waiting for close
-        await db["esp32_logs"].update_one(
+        await _audit_logs(db).update_one(
             {"_id": ObjectId(action_id)},
             {"$set": {"status": "in_progress", "details.sequence": "closing"}}
         )
@@ -494,7 +548,7 @@ async def handle_lid_open_sequence(device_id: str, action: str, duration_seconds
         })
 
         # Update as completed
-        await db["esp32_logs"].update_one(
+        await _audit_logs(db).update_one(
             {"_id": ObjectId(action_id)},
             {"$set": {"status": "completed", "details.sequence": "closed"}}
         )
@@ -515,15 +569,7 @@ async def handle_lid_open_sequence(device_id: str, action: str, duration_seconds
     except Exception as exc:
         logger.error("Error in lid open sequence for %s: %s", device_id, exc)
 
-        # Update log as error
-        try:
-            db = await ensure_connection()
-            await db["esp32_logs"].update_one(
-                {"_id": ObjectId(action_id)},
-                {"$set": {"status": "error", "error_message": str(exc)}}
-            )
-        except:
-            pass
+        await _mark_action_error(action_id, exc)
 
 async def handle_lid_close(device_id: str, action_id: str):
     """Handle lid close action."""
@@ -531,7 +577,7 @@ async def handle_lid_close(device_id: str, action_id: str):
         db = await ensure_connection()
 
         # Update as in progress
-        await db["esp32_logs"].update_one(
+        await _audit_logs(db).update_one(
             {"_id": ObjectId(action_id)},
             {"$set": {"status": "in_progress"}}
         )
@@ -569,13 +615,13 @@ async def handle_lid_close(device_id: str, action_id: str):
 
         if has_error:
             logger.error("ESP32 %s: Close command failed", device_id)
-            await db["esp32_logs"].update_one(
+            await _audit_logs(db).update_one(
                 {"_id": ObjectId(action_id)},
                 {"$set": {"status": "error", "error_message": "Hardware communication failed", "hardware_events": events}}
             )
         else:
             # Update as completed
-            await db["esp32_logs"].update_one(
+            await _audit_logs(db).update_one(
                 {"_id": ObjectId(action_id)},
                 {"$set": {"status": "completed", "hardware_events": events}}
             )
@@ -596,12 +642,4 @@ async def handle_lid_close(device_id: str, action_id: str):
     except Exception as exc:
         logger.error("Error closing lid for %s: %s", device_id, exc)
 
-        # Update log as error
-        try:
-            db = await ensure_connection()
-            await db["esp32_logs"].update_one(
-                {"_id": ObjectId(action_id)},
-                {"$set": {"status": "error", "error_message": str(exc)}}
-            )
-        except:
-            pass
+        await _mark_action_error(action_id, exc)
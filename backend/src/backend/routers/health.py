@@ -1,3 +1,6 @@
+import time
+from functools import lru_cache
+
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from ..db.mongo import ensure_connection
@@ -5,6 +8,20 @@ from ..db.mongo import ensure_connection
 router = APIRouter()
 
 
+@lru_cache(maxsize=1)
+def _websocket_health_snapshot(bucket: int) -> dict:
+    """Connection counts for the probe, computed at most once per second.
+
+    ``bucket`` is the current whole second; a new value evicts the old entry.
+    """
+    from ..services.ws_manager import manager
+    return {
+        'status': 'healthy',
+        'websocket_service': 'running',
+        'active_connections': manager.get_connection_count(),
+    }
+
+
 @router.get("/health")
 async def health_check():
     """Basic health check endpoint that pings MongoDB"""
@@ -20,14 +37,8 @@ async def health_check():
 def websocket_health_check():
     """WebSocket service health check"""
     try:
-        from ..services.ws_manager import manager
-        connection_info = manager.get_connection_info()
-        return JSONResponse({
-            'status': 'healthy',
-            'websocket_service': 'running',
-            'active_connections': connection_info['total_connections'],
-            'connections': connection_info['connections']
-        })
+        # Per-user connection counts are served by the admin-only /ws/connections
+        return JSONResponse(_websocket_health_snapshot(int(time.monotonic())))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"WebSocket service unhealthy: {str(e)}")
 
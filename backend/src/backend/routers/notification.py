@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import JSONResponse
 
 from ..schemas.notification import (
     NotificationCreate,
     NotificationResponse,
     NotificationUpdate,
+    NotificationBulkRead,
     NotificationListResponse,
     NotificationSettingsUpdate,
     NotificationSettingsResponse,
@@ -65,11 +66,13 @@ async def get_notifications(
             notif_dict["user_id"] = str(notif.user_id)
             notification_responses.append(NotificationResponse(**notif_dict))
         
-        return NotificationListResponse(
+        response = NotificationListResponse(
             notifications=notification_responses,
             total=len(notification_responses),
             unread_count=unread_count
         )
+        # Already validated; serialise in pydantic-core instead of jsonable_encoder
+        return Response(response.model_dump_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch notifications: {str(e)}")
 
@@ -102,6 +105,20 @@ async def mark_notification_read(
         raise HTTPException(status_code=500, detail=f"Failed to mark notification as read: {str(e)}")
 
 
+@router.patch("/mark-read")
+async def mark_notifications_read(
+    body: NotificationBulkRead,
+    current_user: User = Depends(get_current_user)
+):
+    """Mark a selection of notifications as read."""
+    try:
+        notification_service = get_notification_service()
+        count = await notification_service.mark_many_as_read(body.notification_ids, current_user.id)
+        return {"message": f"Marked {count} notifications as read"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to mark notifications as read: {str(e)}")
+
+
 @router.patch("/mark-all-read")
 async def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
     """Mark all notifications as read."""
@@ -10,16 +10,20 @@ from ..services.opencv_service import BottleMeasurer, MeasurementError, Measurem
 from ..services.roboflow_service import RoboflowClient
 from ..services.validation_service import validate_scan
 from ..services.transaction_service import get_transaction_service
+from ..core.config import get_settings
 from ..db.mongo import ensure_connection
 from ..schemas.scan import ScanResponse
-from ..services.iot_client import SmartBinClient
+from ..services.iot_client import SmartBinClient, get_http_client, response_excerpt
+from ..services.esp32_log_writer import enqueue_esp32_log
 from ..services.ws_manager import manager
 from ..services.reward_service import add_points
+from ..services.statistics_service import bump_statistics_version
 from ..routers.auth import verify_token
 import base64, binascii
 from pathlib import Path
 from uuid import uuid4
 import httpx
+import orjson
 from bson import ObjectId
 
 router = APIRouter(prefix="/api/scan", tags=["scan"])
@@ -30,81 +34,74 @@ roboflow_client = RoboflowClient()
 smartbin_client = SmartBinClient()
 transaction_service = get_transaction_service()
 
+# The control endpoint only schedules the lid sequence and answers at once,
+# so a slow reply means the backend is unhealthy; don't hold the scan for it
+ESP32_CONTROL_TIMEOUT_SECONDS = 3.0
+# Lid events are only read (stored with the scan and broadcast), so they are
+# tuples and the common no-event case shares one instance
+NO_IOT_EVENTS: tuple = ()
+# Settings are fixed for the life of the process, so the URL is built once
+ESP32_CONTROL_URL = f"{getattr(get_settings(), 'BACKEND_URL', 'http://localhost:8000')}/api/esp32/control"
+
 
 async def control_esp32_lid(device_id: str, duration_seconds: int = 3):
-    """Control ESP32 lid via our new communication system."""
-    try:
-        db = await ensure_connection()
+    """Control ESP32 lid via our new communication system.
 
-        log_result = await db["esp32_logs"].insert_one({
+    The audit entry in ``esp32_logs`` is written once, after the HTTP call,
+    with its final status.
+    """
+    log_id = ObjectId()
+    log_entry = {
+        "_id": log_id,
+        "device_id": device_id,
+        "action": "open",
+        "timestamp": datetime.now(timezone.utc),
+        "details": {"duration_seconds": duration_seconds}
+    }
+    try:
+        client = get_http_client()
+        payload = {
             "device_id": device_id,
             "action": "open",
-            "timestamp": datetime.now(timezone.utc),
-            "status": "pending",
-            "details": {"duration_seconds": duration_seconds}
-        })
-
-        import httpx
-        from ..core.config import get_settings
+            "duration_seconds": duration_seconds
+        }
         
-        settings = get_settings()
-        backend_url = getattr(settings, 'BACKEND_URL', 'http://localhost:8000')
-        esp32_control_url = f"{backend_url}/api/esp32/control"
+        logger.info("Calling ESP32 control endpoint: %s with payload: %s", ESP32_CONTROL_URL, payload)
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            payload = {
-                "device_id": device_id,
-                "action": "open",
-                "duration_seconds": duration_seconds
-            }
+        response = await client.post(
+            ESP32_CONTROL_URL,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=ESP32_CONTROL_TIMEOUT_SECONDS
+        )
+        
+        if response.status_code == 200:
+            response_data = orjson.loads(response.content)
+            logger.info("ESP32 control successful: %s", response_data)
             
-            logger.info("Calling ESP32 control endpoint: %s with payload: %s", esp32_control_url, payload)
+            log_entry.update({"status": "completed", "response": response_data})
             
-            response = await client.post(
-                esp32_control_url,
-                json=payload,
-                headers={"Content-Type": "application/json"}
+            events = (
+                {
+                    "event": "lid_opened",
+                    "status": "success",
+                    "response": response_data
+                },
             )
             
-            if response.status_code == 200:
-                response_data = response.json()
-                logger.info("ESP32 control successful: %s", response_data)
-                
-                await db["esp32_logs"].update_one(
-                    {"_id": log_result.inserted_id},
-                    {"$set": {"status": "completed", "response": response_data}}
-                )
-                
-                events = [
-                    {
-                        "event": "lid_opened",
-                        "status": "success",
-                        "response": response_data
-                    }
-                ]
-                
-                return {"events": events, "action_id": str(log_result.inserted_id)}
-            else:
-                error_message = f"ESP32 control failed with status {response.status_code}: {response.text}"
-                logger.error(error_message)
-                
-                await db["esp32_logs"].update_one(
-                    {"_id": log_result.inserted_id},
-                    {"$set": {"status": "error", "error_message": error_message}}
-                )
-                raise Exception(error_message)
+            result = {"events": events, "action_id": str(log_id)}
+        else:
+            error_message = f"ESP32 control failed with status {response.status_code}: {response_excerpt(response)}"
+            raise Exception(error_message)
 
     except Exception as exc:
         logger.error("ESP32 control failed: %s", exc)
-        try:
-            if 'log_result' in locals():
-                await db["esp32_logs"].update_one(
-                    {"_id": log_result.inserted_id},
-                    {"$set": {"status": "error", "error_message": str(exc)}}
-                )
-        except:
-            pass
-        return {"events": [], "error": str(exc)}
+        log_entry.update({"status": "error", "error_message": str(exc)})
+        result = {"events": NO_IOT_EVENTS, "error": str(exc)}
+
+    # The caller only needs the events; the audit entry is written in a batch
+    enqueue_esp32_log(log_entry)
+    return result
 
 
 @router.options("")
@@ -194,11 +191,11 @@ async def scan_bottle(
                 validation_result.is_valid, validation_result.brand, validation_result.confidence, validation_result.reason)
 
     # 5. Open bin via ESP32 if valid
-    iot_events = []
+    iot_events = NO_IOT_EVENTS
     if validation_result.is_valid:
         # Call ESP32 lid control with dynamic parameters
         esp32_response = await control_esp32_lid(device_id, duration_seconds)
-        iot_events = esp32_response.get("events", [])
+        iot_events = esp32_response.get("events", NO_IOT_EVENTS)
 
     user_total_points: Optional[int] = None
     if validation_result.is_valid and user_email:
@@ -221,6 +218,8 @@ async def scan_bottle(
         })
         scan_id = str(scan_result.inserted_id)
         logger.info("Scan saved successfully with ID: %s", scan_id)
+        if validation_result.is_valid and user_email:
+            bump_statistics_version(user_email)
     except Exception as exc:  # noqa: BLE001
         logger.error("Failed to save scan to DB: %s", exc)
 
@@ -229,7 +228,7 @@ async def scan_bottle(
     if scan_id and validation_result.is_valid and user_email and validation_result.points_awarded > 0:
         try:
             # Resolve user's ObjectId by email for transactions
-            user_doc = await db["users"].find_one({"email": user_email})
+            user_doc = await db["users"].find_one({"email": user_email}, {"_id": 1})
             user_id = str(user_doc["_id"]) if user_doc else None
             if not user_id:
                 logger.warning("Could not resolve user_id for email %s; skipping transaction creation", user_email)
@@ -379,7 +378,7 @@ async def get_user_transaction_summary(payload: dict = Depends(verify_token)):
         logger.info("MongoDB connection established")
         
         # First check if user exists and get their current points
-        user_doc = await db["users"].find_one({"email": user_email})
+        user_doc = await db["users"].find_one({"email": user_email}, {"points": 1})
         total_points = (user_doc.get("points", 0) if user_doc else 0) or 0
         logger.info("User points: %s", total_points)
         
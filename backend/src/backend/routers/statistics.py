@@ -1,44 +1,82 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from typing import Dict, List, Optional, Tuple
 
 from ..schemas.statistics import (
     StatisticsSummaryResponse,
-    UserRankingResponse,
     LeaderboardResponse
 )
-from ..services.statistics_service import StatisticsService
+from ..services.statistics_service import StatisticsService, get_statistics_version
 from ..db.mongo import ensure_connection
 from ..routers.auth import verify_token
 from bson import ObjectId
 
 router = APIRouter(prefix="/statistics", tags=["statistics"])
 
+# StatisticsService holds no per-request state, so one instance serves all requests
+statistics_service = StatisticsService()
+
+# Encoded personal statistics keyed by user id: (etag, body, expires_at).
+# The ETag embeds a per-process epoch so versions reset by a restart never
+# validate a body computed before it.
+_PERSONAL_STATS_TTL_SECONDS = 60
+_PERSONAL_STATS_CACHE_MAX = 10_000
+_ETAG_EPOCH = uuid4().hex[:8]
+_personal_stats_cache: Dict[str, Tuple[str, bytes, float]] = {}
+
+
+def _personal_statistics_etag(user_id: str, user_email: str) -> str:
+    """Weak ETag that changes on every new valid scan and at UTC midnight."""
+    version = get_statistics_version(user_email)
+    today = datetime.utcnow().date().isoformat()
+    return f'W/"{user_id}:{_ETAG_EPOCH}:{version}:{today}"'
+
+
+def _leaderboard_response(rankings: List[dict], total_participants: int, user_rank: Optional[int]) -> Response:
+    """Validate and serialise a leaderboard in a single pydantic-core pass."""
+    leaderboard = LeaderboardResponse.model_validate({
+        "rankings": rankings,
+        "total_participants": total_participants,
+        "user_rank": user_rank,
+    })
+    return Response(leaderboard.model_dump_json(), media_type="application/json")
+
 
 @router.get("/personal", response_model=StatisticsSummaryResponse)
-async def get_personal_statistics(payload: dict = Depends(verify_token)):
-    """Get personal statistics for the authenticated user."""
+async def get_personal_statistics(request: Request, payload: dict = Depends(verify_token)):
+    """Get personal statistics for the authenticated user.
+
+    Responses carry an ``ETag``; a matching ``If-None-Match`` yields 304.
+    """
     try:
         user_id = payload["sub"]
-        service = StatisticsService()
+        etag = _personal_statistics_etag(user_id, payload.get("email", ""))
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
         
-        # Calculate statistics
-        stats = await service.calculate_user_statistics(user_id)
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        
+        cached = _personal_stats_cache.get(user_id)
+        if cached and cached[0] == etag and cached[2] > time.monotonic():
+            return Response(cached[1], media_type="application/json", headers=headers)
         
-        # Add environmental impact summary
-        environmental_impact = {
-            "bottles_equivalent": f"{stats.total_bottles} botol plastik",
-            "plastic_waste": f"{stats.plastic_waste_diverted_kg:.3f} kg sampah plastik",
-            "co2_saved": f"{stats.co2_emissions_saved_kg:.1f} kg CO2",
-            "trees_equivalent": f"{stats.co2_emissions_saved_kg / 20:.2f} pohon (berdasarkan 20 kg CO2 per pohon per tahun)"
-        }
+        # Calculate statistics
+        stats = await statistics_service.calculate_user_statistics(user_id)
         
-        # Convert to response model
-        response_data = stats.dict()
-        response_data["environmental_impact"] = environmental_impact
+        # environmental_impact is a computed field on the response model
+        response = StatisticsSummaryResponse.model_validate(stats, from_attributes=True)
+        body = response.model_dump_json().encode()
+        if len(_personal_stats_cache) >= _PERSONAL_STATS_CACHE_MAX:
+            _personal_stats_cache.clear()
+        _personal_stats_cache[user_id] = (etag, body, time.monotonic() + _PERSONAL_STATS_TTL_SECONDS)
         
-        return StatisticsSummaryResponse(**response_data)
+        return Response(body, media_type="application/json", headers=headers)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get statistics: {str(e)}")
@@ -54,12 +92,8 @@ async def get_leaderboard(
         if limit > 50:
             limit = 50  # Cap at 50 users
         
-        service = StatisticsService()
-        rankings = await service.get_user_rankings(limit)
-        
-        # Add rank numbers
-        for i, rank in enumerate(rankings):
-            rank["rank"] = i + 1
+        # Rank numbers are assigned by the aggregation pipeline
+        rankings = await statistics_service.get_user_rankings(limit)
         
         # Get total participants count
         # Count unique participants with at least one valid scan across all data
@@ -78,11 +112,7 @@ async def get_leaderboard(
                 user_rank = rank.get("rank")
                 break
         
-        return LeaderboardResponse(
-            rankings=[UserRankingResponse(**rank) for rank in rankings],
-            total_participants=total_participants,
-            user_rank=user_rank
-        )
+        return _leaderboard_response(rankings, total_participants, user_rank)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get leaderboard: {str(e)}")
@@ -95,20 +125,13 @@ async def get_public_leaderboard(limit: int = 10):
         if limit > 50:
             limit = 50
         
-        service = StatisticsService()
-        rankings = await service.get_user_rankings(limit)
-        
-        # Add rank numbers
-        for i, rank in enumerate(rankings):
-            rank["rank"] = i + 1
+        # Rank numbers are assigned by the aggregation pipeline
+        rankings = await statistics_service.get_user_rankings(limit)
         
         total_participants = len(rankings)
         
-        return LeaderboardResponse(
-            rankings=[UserRankingResponse(**rank) for rank in rankings],
-            total_participants=total_participants,
-            user_rank=None  # No user context for public endpoint
-        )
+        # No user context for public endpoint
+        return _leaderboard_response(rankings, total_participants, None)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get leaderboard: {str(e)}")
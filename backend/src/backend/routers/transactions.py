@@ -4,89 +4,98 @@ from __future__ import annotations
 
 import logging
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from ..services.transaction_service import get_transaction_service
 from ..db.mongo import ensure_connection
 from ..routers.auth import verify_token
 from ..models.transaction import TransactionResponse
+from ..repositories.transaction_repository import decode_transaction_cursor, encode_transaction_cursor
 
 router = APIRouter(prefix="/api", tags=["transactions"])
 logger = logging.getLogger(__name__)
 
 transaction_service = get_transaction_service()
 
+# Fallback cache for legacy tokens that carry only an email claim
+_USER_ID_CACHE_MAX = 10_000
+_user_id_by_email: dict[str, str] = {}
+
+
+async def _resolve_user_id(payload: dict) -> str:
+    """Return the authenticated user's ObjectId string from the JWT payload.
+
+    Tokens issued by ``/auth`` carry the user id in ``sub``, so no database
+    lookup is needed. Older tokens without ``sub`` fall back to an email lookup
+    that is cached per worker.
+    """
+    user_id = payload.get("sub")
+    if user_id:
+        return str(user_id)
+
+    user_email = payload.get("email")
+    if not user_email:
+        raise HTTPException(status_code=401, detail="Invalid user token")
+
+    cached = _user_id_by_email.get(user_email)
+    if cached:
+        return cached
+
+    db = await ensure_connection()
+    user_doc = await db.users.find_one({"email": user_email}, {"_id": 1})
+    if not user_doc:
+        raise HTTPException(status_code=404, detail="User not found")
+    user_id = str(user_doc["_id"])
+
+    if len(_user_id_by_email) >= _USER_ID_CACHE_MAX:
+        _user_id_by_email.clear()
+    _user_id_by_email[user_email] = user_id
+    return user_id
+
 
 @router.get("/transactions", response_model=List[TransactionResponse])
 async def get_user_transactions(
+    response: Response,
     limit: int = Query(default=20, ge=1, le=100, description="Number of transactions to return"),
     offset: int = Query(default=0, ge=0, description="Number of transactions to skip"),
+    after: Optional[str] = Query(default=None, description="Cursor from X-Next-Cursor; takes precedence over offset"),
     payload: dict = Depends(verify_token)
 ):
-    """Get user's transaction history with pagination."""
+    """Get user's transaction history with pagination.
+
+    When a full page is returned, the cursor for the next page is sent in the
+    ``X-Next-Cursor`` response header.
+    """
     try:
-        user_email = payload.get("email")
-        if not user_email:
-            raise HTTPException(status_code=401, detail="Invalid user token")
+        user_id = await _resolve_user_id(payload)
         
-        # Resolve user's ObjectId by email
-        db = await ensure_connection()
-        user_doc = await db.users.find_one({"email": user_email})
-        if not user_doc:
-            raise HTTPException(status_code=404, detail="User not found")
-        user_id = str(user_doc["_id"])  # Use ObjectId string for repository
+        if after:
+            try:
+                decode_transaction_cursor(after)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid pagination cursor")
         
         transactions = await transaction_service.get_user_transactions(
             user_id=user_id,
             limit=limit,
-            offset=offset
+            offset=offset,
+            after=after
         )
         
+        if len(transactions) == limit:
+            last = transactions[-1]
+            response.headers["X-Next-Cursor"] = encode_transaction_cursor(last.created_at, last.id)
+        
         logger.info("Retrieved %d transactions for user %s (limit: %d, offset: %d)", 
-                   len(transactions), user_email, limit, offset)
+                   len(transactions), user_id, limit, offset)
         
         return transactions
         
-    except Exception as exc:
-        logger.error("Failed to fetch user transactions: %s", exc)
-        raise HTTPException(status_code=500, detail="Failed to fetch transaction history")
-
-
-@router.get("/transactions/{transaction_id}", response_model=TransactionResponse)
-async def get_transaction_details(
-    transaction_id: str,
-    payload: dict = Depends(verify_token)
-):
-    """Get details of a specific transaction."""
-    try:
-        user_email = payload.get("email")
-        if not user_email:
-            raise HTTPException(status_code=401, detail="Invalid user token")
-        
-        # Resolve user's ObjectId by email
-        db = await ensure_connection()
-        user_doc = await db.users.find_one({"email": user_email})
-        if not user_doc:
-            raise HTTPException(status_code=404, detail="User not found")
-        user_id = str(user_doc["_id"])  # Use ObjectId string
-        
-        # Get transaction by scan_id (since we don't have direct transaction ID lookup yet)
-        transaction = await transaction_service.get_transaction_by_scan_id(transaction_id)
-        
-        if not transaction:
-            raise HTTPException(status_code=404, detail="Transaction not found")
-        
-        # Verify the transaction belongs to the authenticated user
-        if transaction.user_id != user_id:
-            raise HTTPException(status_code=403, detail="Access denied to this transaction")
-        
-        return transaction
-        
     except HTTPException:
         raise
     except Exception as exc:
-        logger.error("Failed to fetch transaction %s: %s", transaction_id, exc)
-        raise HTTPException(status_code=500, detail="Failed to fetch transaction details")
+        logger.error("Failed to fetch user transactions: %s", exc)
+        raise HTTPException(status_code=500, detail="Failed to fetch transaction history")
 
 
 @router.get("/transactions/summary")
@@ -95,27 +104,18 @@ async def get_user_transaction_summary(
 ):
     """Get user's transaction summary and statistics."""
     try:
-        user_email = payload.get("email")
-        if not user_email:
-            raise HTTPException(status_code=401, detail="Invalid user token")
-        
-        # Resolve user's ObjectId by email
-        db = await ensure_connection()
-        user_doc = await db.users.find_one({"email": user_email})
-        if not user_doc:
-            raise HTTPException(status_code=404, detail="User not found")
-        user_id = str(user_doc["_id"])  # Use ObjectId string
+        user_id = await _resolve_user_id(payload)
         
+        # The summary aggregation already counts documents in its $group stage,
+        # so a separate count_documents round trip is not needed
         summary = await transaction_service.get_user_transaction_summary(user_id)
-        count = await transaction_service.get_user_transaction_count(user_id)
-        
-        # Add count to summary
-        summary["total_transactions"] = count
         
-        logger.info("Retrieved transaction summary for user %s: %s", user_email, summary)
+        logger.info("Retrieved transaction summary for user %s: %s", user_id, summary)
         
         return summary
         
+    except HTTPException:
+        raise
     except Exception as exc:
         logger.error("Failed to fetch transaction summary for user: %s", exc)
         raise HTTPException(status_code=500, detail="Failed to fetch transaction summary")
@@ -127,23 +127,45 @@ async def get_user_transaction_count(
 ):
     """Get total number of transactions for the authenticated user."""
     try:
-        user_email = payload.get("email")
-        if not user_email:
-            raise HTTPException(status_code=401, detail="Invalid user token")
-        
-        # Resolve user's ObjectId by email
-        db = await ensure_connection()
-        user_doc = await db.users.find_one({"email": user_email})
-        if not user_doc:
-            raise HTTPException(status_code=404, detail="User not found")
-        user_id = str(user_doc["_id"])  # Use ObjectId string
+        user_id = await _resolve_user_id(payload)
         
         count = await transaction_service.get_user_transaction_count(user_id)
         
-        logger.debug("User %s has %d transactions", user_email, count)
+        logger.debug("User %s has %d transactions", user_id, count)
         
         return {"total_transactions": count}
         
+    except HTTPException:
+        raise
     except Exception as exc:
         logger.error("Failed to fetch transaction count for user: %s", exc)
         raise HTTPException(status_code=500, detail="Failed to fetch transaction count")
+
+
+# Declared after the static /transactions/* routes so it does not shadow them
+@router.get("/transactions/{transaction_id}", response_model=TransactionResponse)
+async def get_transaction_details(
+    transaction_id: str,
+    payload: dict = Depends(verify_token)
+):
+    """Get details of a specific transaction."""
+    try:
+        user_id = await _resolve_user_id(payload)
+        
+        # Get transaction by scan_id (since we don't have direct transaction ID lookup yet)
+        transaction = await transaction_service.get_transaction_by_scan_id(transaction_id)
+        
+        if not transaction:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        
+        # Verify the transaction belongs to the authenticated user
+        if transaction.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Access denied to this transaction")
+        
+        return transaction
+        
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.error("Failed to fetch transaction %s: %s", transaction_id, exc)
+        raise HTTPException(status_code=500, detail="Failed to fetch transaction details")
@@ -1,26 +1,193 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends
 from fastapi.responses import JSONResponse
-import json
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Union
 
-from ..services.ws_manager import get_connection_manager, start_websocket_manager, stop_websocket_manager
-from ..models.user import User
+import orjson
+from bson import ObjectId
+
+from ..services.ws_manager import ConnectionManager, encode_message, get_connection_manager, start_websocket_manager, stop_websocket_manager
+from ..routers.auth import require_admin
+from ..schemas.websocket import WebSocketActionResponse, WebSocketConnectionsResponse, WebSocketStatusResponse
 import jwt
 from ..core.config import get_settings
+from ..db.mongo import ensure_connection
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["websocket"])
 
 settings = get_settings()
 
+# Token verification parameters resolved once; PyJWT takes the HMAC key as bytes
+_JWT_SECRET = settings.JWT_SECRET_KEY.encode()
+_JWT_ALGORITHMS = [settings.JWT_ALGORITHM]
+_JWT_DECODE_OPTIONS = {"require": ["sub"]}
+
+# Static frames are encoded once at import instead of on every send
+_CONNECTING_MESSAGE = encode_message({
+    "type": "connection_status",
+    "status": "connecting",
+    "message": "Establishing connection...",
+    "timestamp": "2024-01-01T00:00:00Z"
+})
+_PUBLIC_CONNECTED_MESSAGE = encode_message({
+    "type": "connection_status",
+    "status": "connected",
+    "message": "Connected to public notification channel",
+    "timestamp": "2024-01-01T00:00:00Z"
+})
+_PONG_MESSAGE = encode_message({
+    "type": "pong",
+    "timestamp": "2024-01-01T00:00:00Z"
+})
+
+
+def _error_message(message: str) -> str:
+    """Encode an error frame for the given message."""
+    return encode_message({
+        "type": "error",
+        "message": message,
+        "timestamp": "2024-01-01T00:00:00Z"
+    })
+
+
+_INVALID_JSON_MESSAGE = _error_message("Invalid JSON format")
+_RATE_LIMITED_MESSAGE = _error_message("rate_limited")
+
+
+async def _reply(
+    websocket: WebSocket,
+    frame: str,
+    connection_manager: Optional[ConnectionManager] = None,
+) -> None:
+    """Send a frame, through the connection's outbox when it has one."""
+    if connection_manager is None:
+        await websocket.send_text(frame)
+    else:
+        await connection_manager.send_personal_frame(frame, websocket)
+
+# Echo frames wrap the client's own JSON text between these constant halves
+_ECHO_PREFIX, _ECHO_SUFFIX = encode_message({
+    "type": "echo",
+    "data": None,
+    "timestamp": "2024-01-01T00:00:00Z"
+}).split("null")
+
+# Raw heartbeat frames answered without parsing; the web client sends
+# JSON.stringify({type: 'ping'}) on an interval
+_PING_FRAMES = frozenset({'{"type":"ping"}', '{"type": "ping"}', "ping"})
+# Compact binary opcodes for clients that want to skip JSON entirely
+_OPCODE_PING = b"\x01"
+_OPCODE_STATUS = b"\x02"
+
+@dataclass(frozen=True)
+class WebSocketUser:
+    """Identity of an authenticated WebSocket client."""
+
+    id: str
+    email: str
+
+
+# Authenticated users keyed by token digest so reconnects skip the JWT
+# verify and the users lookup; entries never outlive the token itself
+_AUTH_CACHE_TTL_SECONDS = 300
+_AUTH_CACHE_MAX = 10_000
+_auth_cache: Dict[str, Tuple[WebSocketUser, float]] = {}
+
+# Users keyed by token ``sub`` so a fresh token for a known user (re-login,
+# second device) still skips the users lookup; kept short since profiles change
+_USER_CACHE_TTL_SECONDS = 60
+_user_cache: Dict[str, Tuple[WebSocketUser, float]] = {}
+
+# get_status reads shared manager state, so each socket may ask at most
+# once per interval
+_STATUS_MIN_INTERVAL_SECONDS = 1.0
+_last_status_request: Dict[WebSocket, float] = {}
+
+# Time a client has after connecting to send its token
+AUTH_TIMEOUT_SECONDS = 5.0
+
+# Every broadcast is written to every socket, so cap its encoded size
+MAX_BROADCAST_BYTES = 4096
+
+
+async def _receive_frame(websocket: WebSocket) -> Union[str, bytes]:
+    """Receive one text or binary frame, raising on disconnect like ``receive_text``."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else message.get("bytes") or b""
+
+
+async def _handle_message(
+    websocket: WebSocket,
+    raw: Union[str, bytes],
+    user_id: Optional[str] = None,
+    connection_manager: Optional[ConnectionManager] = None,
+) -> None:
+    """Reply to one client frame on either WebSocket endpoint.
+
+    Single-byte binary frames are opcodes (``0x01`` ping, ``0x02`` status);
+    everything else is JSON. ``get_status`` is only answered on authenticated
+    connections, i.e. when ``user_id`` and ``connection_manager`` are given;
+    anything else is echoed.
+    """
+    if raw in _PING_FRAMES or raw == _OPCODE_PING:
+        await _reply(websocket, _PONG_MESSAGE, connection_manager)
+        return
+
+    if raw == _OPCODE_STATUS:
+        # Behaves exactly like the JSON form, including the echo fallback
+        raw, message_type = '{"type":"get_status"}', "get_status"
+    else:
+        try:
+            message = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            await _reply(websocket, _INVALID_JSON_MESSAGE, connection_manager)
+            return
+        message_type = message.get("type") if isinstance(message, dict) else None
+
+    if message_type == "ping":
+        await _reply(websocket, _PONG_MESSAGE, connection_manager)
+    elif message_type == "get_status" and connection_manager is not None:
+        now = time.monotonic()
+        last = _last_status_request.get(websocket)
+        if last is not None and now - last < _STATUS_MIN_INTERVAL_SECONDS:
+            await _reply(websocket, _RATE_LIMITED_MESSAGE, connection_manager)
+            return
+        _last_status_request[websocket] = now
+        await _reply(websocket, encode_message({
+            "type": "status_response",
+            "data": {
+                "user_id": user_id,
+                "connection_count": connection_manager.get_connection_count(),
+                "user_count": connection_manager.get_user_count()
+            },
+            "timestamp": "2024-01-01T00:00:00Z"
+        }), connection_manager)
+    else:
+        # Echo back unknown message types; raw already parsed as valid JSON,
+        # so it is spliced into the frame instead of being re-encoded
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        await _reply(websocket, _ECHO_PREFIX + raw + _ECHO_SUFFIX, connection_manager)
+
+
 def verify_jwt_token(token: str) -> Optional[dict]:
     """Verify JWT token and return payload (for WebSocket use)"""
     try:
-        logger.info(f"Verifying JWT token: {token[:20]}...")
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        logger.info(f"JWT token decoded successfully, payload keys: {list(payload.keys())}")
-        return payload
+        return jwt.decode(
+            token,
+            _JWT_SECRET,
+            algorithms=_JWT_ALGORITHMS,
+            options=_JWT_DECODE_OPTIONS
+        )
     except jwt.ExpiredSignatureError:
         logger.warning("Token expired")
         return None
@@ -32,38 +199,94 @@ def verify_jwt_token(token: str) -> Optional[dict]:
         return None
 
 
-async def get_current_user_from_token(token: str, max_retries: int = 3) -> Optional[User]:
-    """Get current user from JWT token with retry logic for new users."""
+@lru_cache(maxsize=10_000)
+def _object_id(value: str) -> ObjectId:
+    """Parse a token ``sub`` into an ObjectId, memoised for reconnecting users."""
+    return ObjectId(value)
+
+
+def _token_cache_key(token: str) -> str:
+    """Digest used to key the auth cache without retaining raw tokens."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _get_cached_user(token: str) -> Optional[WebSocketUser]:
+    """Return the cached user for ``token`` if the entry has not expired."""
+    key = _token_cache_key(token)
+    entry = _auth_cache.get(key)
+    if entry is None:
+        return None
+    user, expires_at = entry
+    if time.time() >= expires_at:
+        _auth_cache.pop(key, None)
+        return None
+    return user
+
+
+def _cache_user(token: str, payload: dict, user: WebSocketUser) -> None:
+    """Cache ``user`` until the earlier of the TTL or the token's ``exp``."""
+    expires_at = time.time() + _AUTH_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, exp)
+    if len(_auth_cache) >= _AUTH_CACHE_MAX:
+        _auth_cache.clear()
+    _auth_cache[_token_cache_key(token)] = (user, expires_at)
+    if len(_user_cache) >= _AUTH_CACHE_MAX:
+        _user_cache.clear()
+    _user_cache[str(payload["sub"])] = (user, time.monotonic() + _USER_CACHE_TTL_SECONDS)
+
+
+def _get_cached_user_by_sub(sub: str) -> Optional[WebSocketUser]:
+    """Return the cached user for a token subject if the entry is fresh."""
+    entry = _user_cache.get(sub)
+    if entry is None or time.monotonic() >= entry[1]:
+        return None
+    return entry[0]
+
+
+async def get_current_user_from_token(token: str, max_retries: int = 3) -> Optional[WebSocketUser]:
+    """Get current user from JWT token with retry logic for new users.
+
+    Only the id and email are needed by the WebSocket handler, so no full
+    ``User`` model is built.
+    """
+    cached_user = _get_cached_user(token)
+    if cached_user is not None:
+        return cached_user
+
     for attempt in range(max_retries):
         try:
-            from bson import ObjectId
-            from ..db.mongo import ensure_connection
-            
             # Verify token
-            logger.info(f"Attempting to verify JWT token (attempt {attempt + 1}/{max_retries})")
+            logger.debug("Verifying JWT token (attempt %d/%d)", attempt + 1, max_retries)
             payload = verify_jwt_token(token)
             if not payload:
                 logger.warning(f"JWT token verification failed on attempt {attempt + 1}")
                 return None
             
-            logger.info(f"JWT token verified successfully, payload: {payload}")
+            logger.debug("JWT token verified for sub %s", payload["sub"])
+            
+            known_user = _get_cached_user_by_sub(str(payload["sub"]))
+            if known_user is not None:
+                _cache_user(token, payload, known_user)
+                return known_user
             
             # Get user from database
             db = await ensure_connection()
             users_collection = db.users
             
-            user_id = ObjectId(payload["sub"])
-            logger.info(f"Looking up user with ID: {user_id} (from token sub: {payload['sub']})")
-            user = await users_collection.find_one({"_id": user_id})
+            user_id = _object_id(str(payload["sub"]))
+            user = await users_collection.find_one({"_id": user_id}, {"_id": 1, "email": 1})
             
             if user:
-                logger.info(f"User found in database: {user.get('email', 'unknown')}")
-                return User(**user)
+                logger.debug("User found in database: %s", user.get("email", "unknown"))
+                current_user = WebSocketUser(id=str(user["_id"]), email=user.get("email", ""))
+                _cache_user(token, payload, current_user)
+                return current_user
             
             # If user not found and this is not the last attempt, wait and retry
             if attempt < max_retries - 1:
                 logger.info(f"User {user_id} not found on attempt {attempt + 1}, retrying in {(attempt + 1) * 0.5}s...")
-                import asyncio
                 await asyncio.sleep((attempt + 1) * 0.5)  # Progressive delay: 0.5s, 1s, 1.5s
                 continue
             
@@ -73,7 +296,6 @@ async def get_current_user_from_token(token: str, max_retries: int = 3) -> Optio
         except Exception as e:
             logger.error(f"Error getting user from token (attempt {attempt + 1}): {e}")
             if attempt < max_retries - 1:
-                import asyncio
                 await asyncio.sleep((attempt + 1) * 0.5)
                 continue
             return None
@@ -94,39 +316,30 @@ async def websocket_notifications_endpoint(
         await websocket.accept()
         
         # Send initial connection message
-        await websocket.send_text(json.dumps({
-            "type": "connection_status",
-            "status": "connecting",
-            "message": "Establishing connection...",
-            "timestamp": "2024-01-01T00:00:00Z"
-        }))
+        await websocket.send_text(_CONNECTING_MESSAGE)
         
         # Wait for authentication token from client
         try:
-            # Wait for the first message which should contain the token
-            data = await websocket.receive_text()
+            # Wait for the first message which should contain the token; sockets
+            # that never authenticate are not allowed to hold a coroutine open
+            try:
+                data = await asyncio.wait_for(websocket.receive_text(), timeout=AUTH_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"No authentication from user {user_id} within {AUTH_TIMEOUT_SECONDS}s")
+                await websocket.close(code=1008, reason="Auth timeout")
+                return
             logger.info(f"Received initial message from user {user_id}: {data}")
             
             try:
-                auth_data = json.loads(data)
+                auth_data = orjson.loads(data)
                 token = auth_data.get("token")
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.error(f"Invalid JSON from user {user_id}: {data}")
-                await websocket.send_text(json.dumps({
-                    "type": "error",
-                    "message": "Invalid JSON format",
-                    "timestamp": "2024-01-01T00:00:00Z"
-                }))
                 await websocket.close(code=1008, reason="Invalid JSON")
                 return
             
             if not token:
                 logger.warning(f"No token provided by user {user_id}")
-                await websocket.send_text(json.dumps({
-                    "type": "error",
-                    "message": "Authentication token required",
-                    "timestamp": "2024-01-01T00:00:00Z"
-                }))
                 await websocket.close(code=1008, reason="Authentication required")
                 return
             
@@ -135,23 +348,13 @@ async def websocket_notifications_endpoint(
             user = await get_current_user_from_token(token)
             if not user:
                 logger.warning(f"Invalid token for user {user_id} - token validation failed")
-                await websocket.send_text(json.dumps({
-                    "type": "error",
-                    "message": "Invalid authentication token",
-                    "timestamp": "2024-01-01T00:00:00Z"
-                }))
                 await websocket.close(code=1008, reason="Invalid token")
                 return
             
             logger.info(f"Token validation successful for user {user_id} ({user.email})")
             
-            if str(user.id) != user_id:
+            if user.id != user_id:
                 logger.warning(f"User ID mismatch: token user {user.id} vs path user {user_id}")
-                await websocket.send_text(json.dumps({
-                    "type": "error",
-                    "message": "User ID mismatch",
-                    "timestamp": "2024-01-01T00:00:00Z"
-                }))
                 await websocket.close(code=1008, reason="User ID mismatch")
                 return
             
@@ -159,13 +362,13 @@ async def websocket_notifications_endpoint(
             await connection_manager.connect(websocket, user_id)
             
             # Send success message
-            await websocket.send_text(json.dumps({
+            await connection_manager.send_personal_message({
                 "type": "connection_status",
                 "status": "connected",
                 "message": f"Connected as user {user.email}",
                 "user_id": user_id,
                 "timestamp": "2024-01-01T00:00:00Z"
-            }))
+            }, websocket)
             
             logger.info(f"User {user_id} ({user.email}) authenticated and connected to WebSocket")
             
@@ -173,61 +376,26 @@ async def websocket_notifications_endpoint(
             while True:
                 try:
                     # Wait for messages from client
-                    data = await websocket.receive_text()
-                    
-                    try:
-                        message = json.loads(data)
-                        message_type = message.get("type")
-                        
-                        if message_type == "ping":
-                            # Respond to ping
-                            await websocket.send_text(json.dumps({
-                                "type": "pong",
-                                "timestamp": "2024-01-01T00:00:00Z"
-                            }))
-                        elif message_type == "get_status":
-                            # Send connection status
-                            await websocket.send_text(json.dumps({
-                                "type": "status_response",
-                                "data": {
-                                    "user_id": user_id,
-                                    "connection_count": connection_manager.get_connection_count(),
-                                    "user_count": connection_manager.get_user_count()
-                                },
-                                "timestamp": "2024-01-01T00:00:00Z"
-                            }))
-                        else:
-                            # Echo back unknown message types
-                            await websocket.send_text(json.dumps({
-                                "type": "echo",
-                                "data": message,
-                                "timestamp": "2024-01-01T00:00:00Z"
-                            }))
-                            
-                    except json.JSONDecodeError:
-                        await websocket.send_text(json.dumps({
-                            "type": "error",
-                            "message": "Invalid JSON format",
-                            "timestamp": "2024-01-01T00:00:00Z"
-                        }))
+                    data = await _receive_frame(websocket)
+                    await _handle_message(websocket, data, user_id, connection_manager)
                         
                 except WebSocketDisconnect:
                     logger.info(f"WebSocket disconnected for user {user_id}")
                     break
                 except Exception as e:
                     logger.error(f"Error handling WebSocket message for user {user_id}: {e}")
-                    await websocket.send_text(json.dumps({
+                    await connection_manager.send_personal_message({
                         "type": "error",
                         "message": f"Internal server error: {str(e)}",
                         "timestamp": "2024-01-01T00:00:00Z"
-                    }))
+                    }, websocket)
                     
         except WebSocketDisconnect:
             logger.info(f"WebSocket disconnected during authentication for user {user_id}")
         except Exception as e:
             logger.error(f"Error during WebSocket authentication for user {user_id}: {e}")
             try:
-                await websocket.send_text(json.dumps({
+                await websocket.send_text(encode_message({
                     "type": "error",
                     "message": f"Authentication error: {str(e)}",
                     "timestamp": "2024-01-01T00:00:00Z"
@@ -247,6 +415,7 @@ async def websocket_notifications_endpoint(
     finally:
         # Always disconnect from manager
         connection_manager.disconnect(websocket)
+        _last_status_request.pop(websocket, None)
 
 
 @router.websocket("/ws/public")
@@ -258,41 +427,13 @@ async def websocket_public_endpoint(websocket: WebSocket):
         await websocket.accept()
         
         # Send welcome message
-        await websocket.send_text(json.dumps({
-            "type": "connection_status",
-            "status": "connected",
-            "message": "Connected to public notification channel",
-            "timestamp": "2024-01-01T00:00:00Z"
-        }))
+        await websocket.send_text(_PUBLIC_CONNECTED_MESSAGE)
         
         # Keep connection alive
         while True:
             try:
-                data = await websocket.receive_text()
-                
-                try:
-                    message = json.loads(data)
-                    message_type = message.get("type")
-                    
-                    if message_type == "ping":
-                        await websocket.send_text(json.dumps({
-                            "type": "pong",
-                            "timestamp": "2024-01-01T00:00:00Z"
-                        }))
-                    else:
-                        # Echo back message
-                        await websocket.send_text(json.dumps({
-                            "type": "echo",
-                            "data": message,
-                            "timestamp": "2024-01-01T00:00:00Z"
-                        }))
-                        
-                except json.JSONDecodeError:
-                    await websocket.send_text(json.dumps({
-                        "type": "error",
-                        "message": "Invalid JSON format",
-                        "timestamp": "2024-01-01T00:00:00Z"
-                    }))
+                data = await _receive_frame(websocket)
+                await _handle_message(websocket, data)
                     
             except WebSocketDisconnect:
                 break
@@ -309,7 +450,7 @@ async def websocket_public_endpoint(websocket: WebSocket):
         pass
 
 
-@router.get("/ws/status")
+@router.get("/ws/status", response_model=WebSocketStatusResponse)
 async def get_websocket_status():
     """Get WebSocket connection status."""
     connection_manager = await get_connection_manager()
@@ -321,7 +462,14 @@ async def get_websocket_status():
     }
 
 
-@router.post("/ws/start")
+@router.get("/ws/connections", response_model=WebSocketConnectionsResponse)
+async def get_websocket_connections(payload: dict = Depends(require_admin)):
+    """Get per-user connection counts (admin only)."""
+    connection_manager = await get_connection_manager()
+    return connection_manager.get_connection_info()
+
+
+@router.post("/ws/start", response_model=WebSocketActionResponse)
 async def start_websocket_manager_endpoint():
     """Start the WebSocket manager (admin only)."""
     try:
@@ -331,7 +479,7 @@ async def start_websocket_manager_endpoint():
         raise HTTPException(status_code=500, detail=f"Failed to start WebSocket manager: {str(e)}")
 
 
-@router.post("/ws/stop")
+@router.post("/ws/stop", response_model=WebSocketActionResponse)
 async def stop_websocket_manager_endpoint():
     """Stop the WebSocket manager (admin only)."""
     try:
@@ -341,18 +489,26 @@ async def stop_websocket_manager_endpoint():
         raise HTTPException(status_code=500, detail=f"Failed to stop WebSocket manager: {str(e)}")
 
 
-@router.post("/ws/broadcast")
-async def broadcast_message_endpoint(message: dict):
+@router.post("/ws/broadcast", response_model=WebSocketActionResponse)
+async def broadcast_message_endpoint(message: dict, payload: dict = Depends(require_admin)):
     """Broadcast a message to all connected WebSocket clients (admin only)."""
     try:
+        if len(orjson.dumps(message)) > MAX_BROADCAST_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Broadcast payload exceeds {MAX_BROADCAST_BYTES} bytes"
+            )
+        
         connection_manager = await get_connection_manager()
         await connection_manager.broadcast_notification(message)
         return {"message": "Message broadcasted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to broadcast message: {str(e)}")
 
 
-@router.post("/ws/send/{user_id}")
+@router.post("/ws/send/{user_id}", response_model=WebSocketActionResponse)
 async def send_message_to_user_endpoint(user_id: str, message: dict):
     """Send a message to a specific user (admin only)."""
     try:
@@ -42,7 +42,9 @@ class EducationalResponse(EducationalBase):
     updated_at: datetime
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+        frozen = True
+        extra = "ignore"
         json_schema_extra = {
             "example": {
                 "id": "507f1f77bcf86cd799439011",
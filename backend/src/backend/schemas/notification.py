@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from bson import ObjectId
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from ..models.common import PyObjectId
 
@@ -28,6 +29,8 @@ class NotificationCreate(NotificationBase):
 
 class NotificationResponse(BaseModel):
     """Schema for notification response."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     id: str
     user_id: str
     title: str
@@ -50,11 +53,27 @@ class NotificationUpdate(BaseModel):
     is_read: bool = True
 
 
+class NotificationBulkRead(BaseModel):
+    """Schema for marking several notifications as read at once."""
+    notification_ids: List[str] = Field(..., min_length=1, max_length=100)
+
+    @field_validator("notification_ids")
+    @classmethod
+    def validate_notification_ids(cls, v):
+        invalid = [nid for nid in v if not ObjectId.is_valid(nid)]
+        if invalid:
+            raise ValueError(f"Invalid notification ids: {', '.join(invalid)}")
+        return v
+
+
 class NotificationListResponse(BaseModel):
     """Schema for list of notifications."""
     notifications: List[NotificationResponse]
     total: int
-    unread_count: int
+    unread_count: int = Field(
+        ...,
+        description="Unread notifications, capped at 100; 100 means 100 or more"
+    )
 
 
 class NotificationSettingsUpdate(BaseModel):
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import ClassVar, Literal, Optional
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 import re
 
 
@@ -14,20 +14,27 @@ class PayoutMethodRequest(BaseModel):
     ewallet_provider: Optional[str] = None
     phone_number: Optional[str] = None
 
-    ALLOWED_BANKS: ClassVar[list[str]] = [
+    # Ordered for the /payout/metadata dropdowns; validators use the sets below
+    ALLOWED_BANKS: ClassVar[tuple[str, ...]] = (
         "BCA", "BNI", "BRI", "MANDIRI", "CIMB", "PERMATA", "BSI", "BTN", "BJB",
         "DANAMON", "OCBC", "MAYBANK", "BTPN", "MEGA", "PANIN", "BNC", "BANKJATIM",
-    ]
-    ALLOWED_EWALLETS: ClassVar[list[str]] = [
+    )
+    ALLOWED_EWALLETS: ClassVar[tuple[str, ...]] = (
         "OVO", "GOPAY", "DANA", "SHOPEEPAY", "LINKAJA", "ISAKU", "SPAYLATER",
-    ]
+    )
+    _BANK_CODES: ClassVar[frozenset[str]] = frozenset(ALLOWED_BANKS)
+    _EWALLET_PROVIDERS: ClassVar[frozenset[str]] = frozenset(ALLOWED_EWALLETS)
+
+    _BANK_ACCOUNT_RE: ClassVar[re.Pattern[str]] = re.compile(r"\d{8,20}")
+    # Accept +62, 62, or 0 prefix, followed by 8-13 digits
+    _PHONE_RE: ClassVar[re.Pattern[str]] = re.compile(r"(\+62|62|0)\d{8,13}")
 
     @field_validator("bank_code")
     @classmethod
     def validate_bank_code(cls, v, info):
         values = info.data
         if values.get("method_type") == "bank":
-            if not v or v.upper() not in cls.ALLOWED_BANKS:
+            if not v or v.upper() not in cls._BANK_CODES:
                 raise ValueError("Unsupported bank_code")
             return v.upper()
         return v
@@ -38,7 +45,7 @@ class PayoutMethodRequest(BaseModel):
         if info.data.get("method_type") == "bank":
             if not v:
                 raise ValueError("bank_account_number required for bank method")
-            if not re.fullmatch(r"\d{8,20}", v):
+            if not cls._BANK_ACCOUNT_RE.fullmatch(v):
                 raise ValueError("bank_account_number must be 8-20 digits")
         return v
 
@@ -56,7 +63,7 @@ class PayoutMethodRequest(BaseModel):
     @classmethod
     def validate_ewallet_provider(cls, v, info):
         if info.data.get("method_type") == "ewallet":
-            if not v or v.upper() not in cls.ALLOWED_EWALLETS:
+            if not v or v.upper() not in cls._EWALLET_PROVIDERS:
                 raise ValueError("Unsupported ewallet_provider")
             return v.upper()
         return v
@@ -67,8 +74,7 @@ class PayoutMethodRequest(BaseModel):
         if info.data.get("method_type") == "ewallet":
             if not v:
                 raise ValueError("phone_number required for ewallet method")
-            # Accept +62, 62, or 0 prefix, followed by 8-13 digits
-            if not re.fullmatch(r"(\+62|62|0)\d{8,13}", v):
+            if not cls._PHONE_RE.fullmatch(v):
                 raise ValueError("Invalid Indonesian phone number format")
         return v
 
@@ -100,6 +106,8 @@ class WithdrawalCreateRequest(BaseModel):
 
 
 class WithdrawalResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     id: str
     user_id: str
     amount_points: int
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 
 
 class StatisticsSummaryResponse(BaseModel):
@@ -29,7 +29,15 @@ class StatisticsSummaryResponse(BaseModel):
     last_reward_date: Optional[datetime] = Field(None, description="Date of last reward")
     
     # Environmental impact summary
-    environmental_impact: dict = Field(..., description="Environmental impact summary")
+    @computed_field(description="Environmental impact summary")
+    @property
+    def environmental_impact(self) -> dict:
+        return {
+            "bottles_equivalent": f"{self.total_bottles} botol plastik",
+            "plastic_waste": f"{self.plastic_waste_diverted_kg:.3f} kg sampah plastik",
+            "co2_saved": f"{self.co2_emissions_saved_kg:.1f} kg CO2",
+            "trees_equivalent": f"{self.co2_emissions_saved_kg / 20:.2f} pohon (berdasarkan 20 kg CO2 per pohon per tahun)"
+        }
     
     class Config:
         json_schema_extra = {
@@ -65,6 +73,9 @@ class UserRankingResponse(BaseModel):
     rank: int = Field(..., description="User rank position")
     
     class Config:
+        # One instance per leaderboard row; rows are never mutated after validation
+        frozen = True
+        extra = "ignore"
         json_schema_extra = {
             "example": {
                 "user_id": "507f1f77bcf86cd799439011",
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Dict
+from pydantic import BaseModel
+
+
+class WebSocketStatusResponse(BaseModel):
+    total_connections: int
+    total_users: int
+    status: str
+
+
+class WebSocketConnectionsResponse(BaseModel):
+    total_connections: int
+    total_users: int
+    connections: Dict[str, int]
+
+
+class WebSocketActionResponse(BaseModel):
+    message: str
@@ -1,74 +1,118 @@
 from __future__ import annotations
 
+import re
 from typing import List, Optional, Dict, Any
 
 from ..db.mongo import ensure_connection
 from ..models.educational import EducationalContent
 from bson import ObjectId
+from pymongo import UpdateOne
+
+# Runs of non-alphanumeric characters (Unicode-aware, underscores included)
+# collapse to a single slug separator
+_SLUG_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+# Legacy content types whose documents default to the "tutorial" category
+_TUTORIAL_CONTENT_TYPES = ("tutorial", "tip", "guide")
+
+# Server-side equivalent of EducationalService._normalize_doc for listings
+_NORMALIZE_STAGE: Dict[str, Any] = {"$set": {
+    "description": {"$ifNull": ["$description", ""]},
+    "content": {"$ifNull": ["$content", {"$ifNull": ["$description", ""]}]},
+    "category": {"$ifNull": ["$category", {"$cond": [
+        {"$in": [{"$ifNull": ["$content_type", "article"]}, list(_TUTORIAL_CONTENT_TYPES)]},
+        "tutorial",
+        "article",
+    ]}]},
+    "estimated_read_time": {"$ifNull": ["$estimated_read_time", 5]},
+    "tags": {"$ifNull": ["$tags", []]},
+    "is_published": {"$ifNull": ["$is_published", True]},
+    "content_type": {"$ifNull": ["$content_type", "article"]},
+}}
 
 
 class EducationalService:
     """Service for CRUD operations on educational content."""
 
     def __init__(self):
-        pass
+        self._collection = None
+
+    async def _get_collection(self):
+        """Resolve the collection once; Motor reconnects the pooled client itself."""
+        if self._collection is None:
+            db = await ensure_connection()
+            self._collection = db.educational_contents
+        return self._collection
 
     async def create(self, data: dict) -> EducationalContent:
         payload = EducationalContent(**data)
-        db = await ensure_connection()
-        collection = db.educational_contents
-        result = await collection.insert_one(payload.model_dump(by_alias=True, exclude={"id"}))
+        collection = await self._get_collection()
+        # The model is flat and freshly validated, so its field dict is already
+        # the document; copying it skips a full serializer pass
+        document = dict(payload.__dict__)
+        document.pop("id", None)
+        result = await collection.insert_one(document)
         payload.id = str(result.inserted_id)
         return payload
 
-    async def list(self, limit: int = 50, skip: int = 0, filters: Optional[Dict[str, Any]] = None) -> list[EducationalContent]:
-        db = await ensure_connection()
-        collection = db.educational_contents
+    async def list(
+        self,
+        limit: int = 50,
+        skip: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> list[EducationalContent]:
+        """List contents newest first."""
+        collection = await self._get_collection()
         query: Dict[str, Any] = filters or {}
-        cursor = collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        items: List[EducationalContent] = []
-        async for doc in cursor:
-            items.append(EducationalContent.model_validate(self._normalize_doc(doc)))
-        return items
+        # Page first so the index serves the sort and defaults are only
+        # computed for the documents returned
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": query},
+            {"$sort": {"created_at": -1}},
+            {"$skip": skip},
+            {"$limit": limit},
+            _NORMALIZE_STAGE,
+        ]
+        docs = await collection.aggregate(pipeline).to_list(length=limit)
+        for doc in docs:
+            # MongoDB has no regex replace, so only the slug fallback stays here
+            if "slug" not in doc:
+                doc["slug"] = self._slugify(doc.get("title") or "Untitled")
+        return [EducationalContent.from_db(doc) for doc in docs]
 
     async def get(self, content_id: str | ObjectId) -> Optional[EducationalContent]:
         if isinstance(content_id, str):
             content_id = ObjectId(content_id)
-        db = await ensure_connection()
-        collection = db.educational_contents
+        collection = await self._get_collection()
         doc = await collection.find_one({"_id": content_id})
         if doc:
-            return EducationalContent.model_validate(self._normalize_doc(doc))
+            return EducationalContent.from_db(self._normalize_doc(doc))
         return None
 
     async def get_by_slug(self, slug: str) -> Optional[EducationalContent]:
-        db = await ensure_connection()
-        collection = db.educational_contents
+        collection = await self._get_collection()
         doc = await collection.find_one({"slug": slug})
         if doc:
-            return EducationalContent.model_validate(self._normalize_doc(doc))
+            return EducationalContent.from_db(self._normalize_doc(doc))
         return None
 
     async def update(self, content_id: str | ObjectId, data: dict) -> Optional[EducationalContent]:
         if isinstance(content_id, str):
             content_id = ObjectId(content_id)
-        db = await ensure_connection()
-        collection = db.educational_contents
+        collection = await self._get_collection()
         await collection.update_one({"_id": content_id}, {"$set": data})
         return await self.get(content_id)
 
     async def delete(self, content_id: str | ObjectId) -> bool:
         if isinstance(content_id, str):
             content_id = ObjectId(content_id)
-        db = await ensure_connection()
-        collection = db.educational_contents
+        collection = await self._get_collection()
         result = await collection.delete_one({"_id": content_id})
         return result.deleted_count == 1
 
     async def seed_initial_education_contents(self) -> None:
         """Seed a minimal set of Infoin contents if they are missing."""
-        db = await ensure_connection()
-        collection = db.educational_contents
+        collection = await self._get_collection()
 
         initial_items: List[dict] = [
             {
@@ -172,33 +216,50 @@ class EducationalService:
             },
         ]
 
-        for item in initial_items:
-            exists = await collection.find_one({"slug": item["slug"]})
-            if not exists:
-                await collection.insert_one(item)
+        # One round trip: each item is inserted only if its slug is missing
+        await collection.bulk_write(
+            [UpdateOne({"slug": item["slug"]}, {"$setOnInsert": item}, upsert=True) for item in initial_items],
+            ordered=False,
+        )
 
     # Internal helpers
     def _slugify(self, text: str) -> str:
-        safe = ''.join(ch.lower() if ch.isalnum() else '-' for ch in text)
-        while '--' in safe:
-            safe = safe.replace('--', '-')
-        return safe.strip('-')
+        return _SLUG_SEPARATOR_RE.sub('-', text.lower()).strip('-')
 
     def _normalize_doc(self, doc: Dict[str, Any]) -> Dict[str, Any]:
         """Fill defaults for legacy documents so pydantic validation does not fail."""
         if not doc:
             return doc
         normalized = dict(doc)
-        title = normalized.get('title') or 'Untitled'
-        normalized.setdefault('description', normalized.get('description') or '')
-        normalized.setdefault('content', normalized.get('content') or normalized.get('description') or '')
-        normalized.setdefault('slug', normalized.get('slug') or self._slugify(title))
-        # Derive category from existing content_type if missing
+        # Only missing keys are filled, so defaults are computed only for those
+        if 'description' not in normalized:
+            normalized['description'] = ''
+        if 'content' not in normalized:
+            normalized['content'] = normalized['description'] or ''
+        if 'slug' not in normalized:
+            normalized['slug'] = self._slugify(normalized.get('title') or 'Untitled')
         content_type = normalized.get('content_type') or 'article'
-        category_guess = 'tutorial' if content_type in ['tutorial', 'tip', 'guide'] else 'article'
-        normalized.setdefault('category', normalized.get('category') or category_guess)
-        normalized.setdefault('estimated_read_time', normalized.get('estimated_read_time') or 5)
-        normalized.setdefault('tags', normalized.get('tags') or [])
-        normalized.setdefault('is_published', normalized.get('is_published') if 'is_published' in normalized else True)
-        normalized.setdefault('content_type', content_type)
+        if 'category' not in normalized:
+            # Derive category from existing content_type
+            normalized['category'] = 'tutorial' if content_type in _TUTORIAL_CONTENT_TYPES else 'article'
+        if 'estimated_read_time' not in normalized:
+            normalized['estimated_read_time'] = 5
+        if 'tags' not in normalized:
+            normalized['tags'] = []
+        if 'is_published' not in normalized:
+            normalized['is_published'] = True
+        if 'content_type' not in normalized:
+            normalized['content_type'] = content_type
         return normalized
+
+
+# Singleton instance so the cached collection handle is shared process-wide
+_educational_service: Optional[EducationalService] = None
+
+
+def get_educational_service() -> EducationalService:
+    """Get educational service instance."""
+    global _educational_service
+    if _educational_service is None:
+        _educational_service = EducationalService()
+    return _educational_service
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from pymongo import InsertOne, WriteConcern
+
+from ..db.mongo import ensure_connection
+
+logger = logging.getLogger(__name__)
+
+# Writes gathered into one bulk_write, and how long the first queued entry
+# may wait for company before the batch is sent
+LOG_BATCH_MAX = 100
+LOG_FLUSH_INTERVAL_SECONDS = 0.05
+
+# Lid-control audit entries are fire-and-forget telemetry
+_AUDIT_WRITE_CONCERN = WriteConcern(w=0)
+
+# Queued by stop_esp32_log_writer to end the flush loop
+_STOP = object()
+
+_log_ops: Optional[asyncio.Queue] = None
+_log_flusher: Optional[asyncio.Task] = None
+
+
+def enqueue_esp32_log(log_entry: dict) -> None:
+    """Queue an ``esp32_logs`` document for the next batched write."""
+    global _log_ops, _log_flusher
+    if _log_ops is None:
+        _log_ops = asyncio.Queue()
+    if _log_flusher is None or _log_flusher.done():
+        _log_flusher = asyncio.create_task(_flush_loop(_log_ops))
+    _log_ops.put_nowait(InsertOne(log_entry))
+
+
+async def _write_batch(ops: List[InsertOne]) -> None:
+    """Send one batch; a failure is logged and never reaches the scan path."""
+    try:
+        db = await ensure_connection()
+        collection = db["esp32_logs"].with_options(write_concern=_AUDIT_WRITE_CONCERN)
+        await collection.bulk_write(ops, ordered=False)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Failed to record %d ESP32 log(s): %s", len(ops), exc)
+
+
+async def _flush_loop(queue: asyncio.Queue) -> None:
+    """Drain the queue in batches of up to ``LOG_BATCH_MAX`` operations.
+
+    Returns after writing the batch in progress once ``_STOP`` is dequeued.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        op = await queue.get()
+        if op is _STOP:
+            return
+        ops = [op]
+        stopping = False
+        deadline = loop.time() + LOG_FLUSH_INTERVAL_SECONDS
+        while len(ops) < LOG_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                op = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if op is _STOP:
+                stopping = True
+                break
+            ops.append(op)
+        await _write_batch(ops)
+        if stopping:
+            return
+
+
+async def stop_esp32_log_writer() -> None:
+    """Stop the flusher and write whatever is still queued (called on shutdown)."""
+    global _log_ops, _log_flusher
+    if _log_flusher is not None:
+        if not _log_flusher.done():
+            # A sentinel rather than cancel(), so the batch being gathered is
+            # written instead of dropped
+            _log_ops.put_nowait(_STOP)
+            await _log_flusher
+        _log_flusher = None
+    if _log_ops is not None:
+        ops = []
+        while not _log_ops.empty():
+            op = _log_ops.get_nowait()
+            if op is not _STOP:
+                ops.append(op)
+        if ops:
+            await _write_batch(ops)
+    _log_ops = None
@@ -1,28 +1,81 @@
 from __future__ import annotations
 
-import asyncio
-import json
+import importlib.util
 import logging
 from typing import List, Dict, Any, Optional
 
 import httpx
+import orjson
 
 from ..core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Outbound device-control calls share one connection pool so repeated calls
+# to the same host reuse keep-alive connections instead of handshaking again
+HTTP_TIMEOUT_SECONDS = 10.0
+_http_client: Optional[httpx.AsyncClient] = None
+
+# HTTP/2 lets concurrent calls to a TLS host (the backend's own public URL)
+# share one connection; ALPN falls back to HTTP/1.1 for plain-HTTP devices.
+# It needs the optional ``h2`` package.
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# Direct calls to a device on the local network: a device that cannot even
+# accept a connection within a few seconds is treated as unreachable
+DEVICE_TIMEOUT = httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=3.0)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT_SECONDS,
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32, keepalive_expiry=60.0),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# Device error pages are only logged or echoed back, so at most this many
+# bytes of a response body are ever decoded
+RESPONSE_EXCERPT_BYTES = 1024
+
+
+def response_excerpt(response: httpx.Response) -> str:
+    """Decode the start of a response body for logs and error messages."""
+    return response.content[:RESPONSE_EXCERPT_BYTES].decode("utf-8", errors="replace")
+
+# Success events for a completed open sequence; callers treat events as
+# read-only, so the close event is shared rather than rebuilt per call
+_LID_OPENED_EVENT: Dict[str, Any] = {"event": "lid_opened", "status": "success"}
+_LID_CLOSED_EVENT: Dict[str, Any] = {"event": "lid_closed", "status": "success"}
+
 
 class SmartBinClient:
     """Client to control SmartBin via HTTP requests or command queuing."""
 
     def __init__(self, esp32_ip: str | None = None):
         self.esp32_ip = esp32_ip
-        self.timeout = 10.0  # 10 seconds timeout
+        self.timeout = DEVICE_TIMEOUT
         self.control_url = f"http://{esp32_ip}:80/control" if esp32_ip else None
-        self.backend_url = get_settings().BACKEND_URL if hasattr(get_settings(), 'BACKEND_URL') else "https://api.setorin.app"
+        self.backend_url = getattr(get_settings(), "BACKEND_URL", "https://api.setorin.app")
 
     async def open_bin(self, device_id: str = "ESP32-SMARTBIN-420", duration_seconds: int = 3) -> List[Dict[str, Any]]:
-        """Send open command to ESP32 via HTTP and return response data."""
+        """Send open command to ESP32 via HTTP and return response data.
+
+        The firmware's ``open`` action already runs the whole open -> wait ->
+        close cycle, so one request yields both lid events.
+        """
         if not self.esp32_ip or not self.control_url:
             logger.error("ESP32 IP address not set")
             return [{"error": "ESP32 IP address not configured"}]
@@ -32,57 +85,53 @@ class SmartBinClient:
         try:
             logger.info("Sending HTTP request to ESP32: %s", self.control_url)
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                payload = {
-                    "action": "open",
-                    "duration_seconds": duration_seconds
-                }
-
-                # Add device_id if provided
-                if device_id:
-                    payload["device_id"] = device_id
-
-                logger.info("Payload: %s", payload)
-
-                response = await client.post(
-                    self.control_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-
-                logger.info("ESP32 response status: %d", response.status_code)
-                logger.info("ESP32 response: %s", response.text)
-
-                if response.status_code == 200:
-                    try:
-                        response_data = response.json()
-                        events.append({
-                            "event": "lid_opened",
-                            "status": "success",
-                            "response": response_data
-                        })
-
-                        # Since the ESP32 handles the full sequence (open -> wait -> close),
-                        # we can immediately add the close event
-                        events.append({
-                            "event": "lid_closed",
-                            "status": "success"
-                        })
-
-                    except json.JSONDecodeError as e:
-                        logger.error("Failed to parse ESP32 response: %s", e)
-                        events.append({
-                            "event": "error",
-                            "status": "error",
-                            "error": "Invalid JSON response from ESP32"
-                        })
-                else:
-                    logger.error("ESP32 returned error status: %d", response.status_code)
+            client = get_http_client()
+            payload = {
+                "action": "open",
+                "duration_seconds": duration_seconds
+            }
+
+            # Add device_id if provided
+            if device_id:
+                payload["device_id"] = device_id
+
+            logger.info("Payload: %s", payload)
+
+            response = await client.post(
+                self.control_url,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            )
+
+            logger.info("ESP32 response status: %d", response.status_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("ESP32 response: %s", response_excerpt(response))
+
+            if response.status_code == 200:
+                try:
+                    response_data = orjson.loads(response.content)
+                    # Since the ESP32 handles the full sequence (open -> wait -> close),
+                    # we can immediately add the close event
+                    events.extend((
+                        dict(_LID_OPENED_EVENT, response=response_data),
+                        _LID_CLOSED_EVENT,
+                    ))
+
+                except orjson.JSONDecodeError as e:
+                    logger.error("Failed to parse ESP32 response: %s", e)
                     events.append({
                         "event": "error",
                         "status": "error",
-                        "error": f"HTTP {response.status_code}: {response.text}"
+                        "error": "Invalid JSON response from ESP32"
                     })
+            else:
+                logger.error("ESP32 returned error status: %d", response.status_code)
+                events.append({
+                    "event": "error",
+                    "status": "error",
+                    "error": f"HTTP {response.status_code}: {response_excerpt(response)}"
+                })
 
         except httpx.TimeoutException:
             logger.error("Timeout communicating with ESP32 at %s", self.esp32_ip)
@@ -115,25 +164,24 @@ class SmartBinClient:
         try:
             logger.info("Queuing command for ESP32 %s: %s", device_id, action)
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Store command in database for ESP32 to poll
-                command_data = {
-                    "device_id": device_id,
-                    "action": action,
-                    "duration_seconds": duration_seconds,
-                    "status": "queued",
-                    "timestamp": "now"
-                }
-
-                # For now, we'll use a simple approach - the ESP32 can poll for commands
-                # In production, you'd store this in the database
-                logger.info("Command queued successfully: %s", command_data)
-
-                return {
-                    "status": "queued",
-                    "command_id": f"{device_id}_{action}",
-                    "message": f"Command {action} queued for device {device_id}"
-                }
+            # Store command in database for ESP32 to poll
+            command_data = {
+                "device_id": device_id,
+                "action": action,
+                "duration_seconds": duration_seconds,
+                "status": "queued",
+                "timestamp": "now"
+            }
+
+            # For now, we'll use a simple approach - the ESP32 can poll for commands
+            # In production, you'd store this in the database
+            logger.info("Command queued successfully: %s", command_data)
+
+            return {
+                "status": "queued",
+                "command_id": f"{device_id}_{action}",
+                "message": f"Command {action} queued for device {device_id}"
+            }
 
         except Exception as exc:
             logger.error("Error queuing command: %s", exc)
@@ -159,34 +207,35 @@ class SmartBinClient:
         try:
             logger.info("Sending close command to ESP32: %s", self.control_url)
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                payload = {
-                    "action": "close"
-                }
-
-                if device_id:
-                    payload["device_id"] = device_id
-
-                response = await client.post(
-                    self.control_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-
-                logger.info("ESP32 close response status: %d", response.status_code)
+            client = get_http_client()
+            payload = {
+                "action": "close"
+            }
 
-                if response.status_code == 200:
-                    events.append({
-                        "event": "lid_closed",
-                        "status": "success",
-                        "response": response.json() if response.text else {}
-                    })
-                else:
-                    events.append({
-                        "event": "error",
-                        "status": "error",
-                        "error": f"HTTP {response.status_code}: {response.text}"
-                    })
+            if device_id:
+                payload["device_id"] = device_id
+
+            response = await client.post(
+                self.control_url,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            )
+
+            logger.info("ESP32 close response status: %d", response.status_code)
+
+            if response.status_code == 200:
+                events.append({
+                    "event": "lid_closed",
+                    "status": "success",
+                    "response": orjson.loads(response.content) if response.content else {}
+                })
+            else:
+                events.append({
+                    "event": "error",
+                    "status": "error",
+                    "error": f"HTTP {response.status_code}: {response_excerpt(response)}"
+                })
 
         except Exception as exc:
             logger.error("Error closing lid: %s", exc)
@@ -1,14 +1,131 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import asyncio
+import time
+from functools import lru_cache
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
+from ..models.common import MongoBaseModel
 from ..models.notification import Notification, NotificationSettings
 from ..db.mongo import ensure_connection
 
 
+_BIN_STATUS_TITLES = {
+    "full": "Tong Sampah Penuh",
+    "maintenance": "Tong Sampah Dalam Perawatan",
+    "available": "Tong Sampah Tersedia"
+}
+_DEFAULT_BIN_STATUS_TITLE = "Update Status Tong Sampah"
+_BIN_FULL_MESSAGE = (
+    "Tong sampah di {location} sudah penuh. "
+    "Silakan gunakan tong sampah lain atau tunggu sampai dikosongkan."
+)
+_BOTTLE_MILESTONES = frozenset({10, 25, 50, 100, 250, 500, 1000})
+# Upper bound reported by get_unread_count; clients show it as "100+"
+UNREAD_COUNT_LIMIT = 100
+# Settings flag that enables each notification type
+_NOTIFICATION_TYPE_TOGGLES = {
+    "bin_status": "bin_status_notifications",
+    "achievement": "achievement_notifications",
+    "reward": "reward_notifications",
+    "system": "system_notifications",
+}
+
+
+# Settings change only through update_settings, so they are cached in-process
+# and dropped there; the TTL bounds staleness from writes by other processes
+_SETTINGS_TTL_SECONDS = 300
+_SETTINGS_CACHE_MAX = 10_000
+_settings_cache: Dict[ObjectId, Tuple[float, NotificationSettings]] = {}
+
+
+def _cached_settings(user_id: ObjectId) -> Optional[NotificationSettings]:
+    """Return cached settings for a user if they have not expired."""
+    cached = _settings_cache.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+
+def _cache_settings(settings: NotificationSettings) -> NotificationSettings:
+    """Store settings in the cache and return them."""
+    if len(_settings_cache) >= _SETTINGS_CACHE_MAX:
+        _settings_cache.clear()
+    _settings_cache[settings.user_id] = (time.monotonic() + _SETTINGS_TTL_SECONDS, settings)
+    return settings
+
+
+# Unread counts polled by the notification bell. Writes through this service
+# adjust the cached value in place; the TTL bounds drift from other processes.
+_UNREAD_TTL_SECONDS = 30
+_UNREAD_CACHE_MAX = 10_000
+_unread_counts: Dict[ObjectId, Tuple[float, int]] = {}
+
+
+def _cached_unread_count(user_id: ObjectId) -> Optional[int]:
+    """Return the cached unread count for a user if it has not expired."""
+    cached = _unread_counts.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+
+def _cache_unread_count(user_id: ObjectId, count: int) -> int:
+    """Store an unread count in the cache and return it."""
+    if len(_unread_counts) >= _UNREAD_CACHE_MAX:
+        _unread_counts.clear()
+    _unread_counts[user_id] = (time.monotonic() + _UNREAD_TTL_SECONDS, count)
+    return count
+
+
+def _adjust_unread_count(user_id: ObjectId, delta: int) -> None:
+    """Apply a known change to a cached count; uncached users are left alone."""
+    cached = _unread_counts.get(user_id)
+    if cached is None:
+        return
+    expires_at, count = cached
+    if delta < 0 and count >= UNREAD_COUNT_LIMIT:
+        # A capped count hides the real total, so it cannot be decremented
+        _unread_counts.pop(user_id, None)
+        return
+    _unread_counts[user_id] = (expires_at, min(max(count + delta, 0), UNREAD_COUNT_LIMIT))
+
+
+@lru_cache(maxsize=4096)
+def _user_object_id(user_id: str) -> ObjectId:
+    """Parse a user id string; the same few users are looked up repeatedly."""
+    return ObjectId(user_id)
+
+
+def _settings_from_doc(settings: dict) -> NotificationSettings:
+    """Build settings from a stored document, defaulting any missing field."""
+    # Construct explicitly to avoid mocks dropping fields
+    return NotificationSettings(
+        id=settings.get("_id"),
+        user_id=settings.get("user_id"),
+        email_notifications=bool(settings.get("email_notifications", True)),
+        push_notifications=bool(settings.get("push_notifications", True)),
+        bin_status_notifications=bool(settings.get("bin_status_notifications", True)),
+        achievement_notifications=bool(settings.get("achievement_notifications", True)),
+        system_notifications=bool(settings.get("system_notifications", True)),
+        reward_notifications=bool(settings.get("reward_notifications", True)),
+        quiet_hours_start=int(settings.get("quiet_hours_start", 22)),
+        quiet_hours_end=int(settings.get("quiet_hours_end", 7)),
+    )
+
+
+def _to_document(model: MongoBaseModel) -> dict:
+    """Dump a model for insertion; Mongo assigns ``_id``.
+
+    ``PyObjectId`` aliases every ObjectId field to ``id`` when dumping by
+    alias, which would drop ``user_id``, so field names are used instead.
+    """
+    return model.model_dump(exclude={"id"})
+
+
 class NotificationService:
     """Service for managing notifications."""
     
@@ -23,7 +140,7 @@ class NotificationService:
     ) -> Notification:
         """Create a new notification."""
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
             
         notification_data = {
             "user_id": user_id,
@@ -39,8 +156,9 @@ class NotificationService:
         # Insert into database using ensure_connection
         db = await ensure_connection()
         notifications_collection = db.notifications
-        result = await notifications_collection.insert_one(notification.model_dump(by_alias=True))
+        result = await notifications_collection.insert_one(_to_document(notification))
         notification.id = result.inserted_id
+        _adjust_unread_count(user_id, 1)
         
         return notification
     
@@ -52,13 +170,7 @@ class NotificationService:
         message: str
     ) -> Notification:
         """Create a bin status notification."""
-        title_map = {
-            "full": "Tong Sampah Penuh",
-            "maintenance": "Tong Sampah Dalam Perawatan",
-            "available": "Tong Sampah Tersedia"
-        }
-        
-        title = title_map.get(bin_status, "Update Status Tong Sampah")
+        title = _BIN_STATUS_TITLES.get(bin_status, _DEFAULT_BIN_STATUS_TITLE)
         
         return await self.create_notification(
             user_id=user_id,
@@ -131,25 +243,54 @@ class NotificationService:
         bin_id: str,
         location: str = "Lokasi tidak diketahui"
     ) -> List[Notification]:
-        """Create bin full notifications for all users."""
+        """Create bin full notifications for all users.
+
+        Settings are read with one query and the notifications are written
+        with one ``insert_many`` instead of a round trip per user. Missing
+        default settings are stored concurrently with the notifications.
+        """
         db = await ensure_connection()
-        users_collection = db.users
-        
-        # Get all users
-        users = await users_collection.find({}).to_list(length=None)
-        
-        notifications = []
-        for user in users:
-            # Check if user wants bin status notifications
-            settings = await self.get_or_create_settings(user["_id"])
-            if settings.bin_status_notifications:
-                notification = await self.create_bin_status_notification(
-                    user_id=user["_id"],
-                    bin_id=bin_id,
-                    bin_status="full",
-                    message=f"Tong sampah di {location} sudah penuh. Silakan gunakan tong sampah lain atau tunggu sampai dikosongkan."
-                )
-                notifications.append(notification)
+        
+        user_ids = [user["_id"] async for user in db.users.find({}, {"_id": 1})]
+        if not user_ids:
+            return []
+        
+        settings_by_user, missing = await self._find_settings_bulk(user_ids)
+        # Defaults allow bin status notifications
+        settings_by_user.update((settings.user_id, settings) for settings in missing)
+        
+        message = _BIN_FULL_MESSAGE.format(location=location)
+        # Every recipient gets the same content, so it is validated once and
+        # copied per user; ids come from insert_many
+        template = Notification(
+            user_id=user_ids[0],
+            title=_BIN_STATUS_TITLES["full"],
+            message=message,
+            notification_type="bin_status",
+            bin_id=bin_id,
+            bin_status="full",
+            priority=3,
+        )
+        notifications = [
+            template.model_copy(update={"user_id": user_id})
+            for user_id in user_ids
+            if settings_by_user[user_id].bin_status_notifications
+        ]
+        if not notifications:
+            await self._insert_default_settings(missing)
+            return []
+        
+        # The two writes touch different collections and do not depend on each other
+        _, result = await asyncio.gather(
+            self._insert_default_settings(missing),
+            db.notifications.insert_many(
+                [_to_document(notification) for notification in notifications],
+                ordered=False,
+            ),
+        )
+        for notification, inserted_id in zip(notifications, result.inserted_ids):
+            notification.id = inserted_id
+            _adjust_unread_count(notification.user_id, 1)
         
         return notifications
     
@@ -159,9 +300,7 @@ class NotificationService:
         bottle_count: int
     ) -> Optional[Notification]:
         """Create achievement notifications for bottle milestones."""
-        milestones = [10, 25, 50, 100, 250, 500, 1000]
-        
-        if bottle_count in milestones:
+        if bottle_count in _BOTTLE_MILESTONES:
             achievement_type = f"Botol ke-{bottle_count}"
             message = f"Selamat! Anda telah membuang {bottle_count} botol. Teruskan semangat peduli lingkungan Anda!"
             
@@ -265,75 +404,51 @@ class NotificationService:
         settings = await self.get_or_create_settings(user_id)
         
         # Check if user has enabled this type of notification
-        if notification_type == "bin_status" and not settings.bin_status_notifications:
-            return False
-        elif notification_type == "achievement" and not settings.achievement_notifications:
-            return False
-        elif notification_type == "reward" and not settings.reward_notifications:
-            return False
-        elif notification_type == "system" and not settings.system_notifications:
+        toggle = _NOTIFICATION_TYPE_TOGGLES.get(notification_type)
+        if toggle is not None and not getattr(settings, toggle):
             return False
         
         # Check quiet hours
-        current_hour = datetime.utcnow().hour
-        if settings.quiet_hours_start <= settings.quiet_hours_end:
-            # Normal case: start < end (e.g., 22:00 - 07:00)
-            if settings.quiet_hours_start <= current_hour <= 23 or 0 <= current_hour <= settings.quiet_hours_end:
-                return False
-        else:
-            # Wrapped case: start > end (e.g., 22:00 - 07:00)
-            if current_hour >= settings.quiet_hours_start or current_hour <= settings.quiet_hours_end:
-                return False
-        
-        return True
+        current_hour = datetime.now(timezone.utc).hour
+        return not (settings.quiet_mask >> current_hour) & 1
     
-    async def get_user_notifications(
+    async def iter_user_notifications(
         self,
         user_id: str | ObjectId,
         limit: int = 50,
         unread_only: bool = False
-    ) -> List[Notification]:
-        """Get notifications for a specific user."""
+    ) -> AsyncIterator[Notification]:
+        """Yield a user's notifications, newest first, as the cursor returns them."""
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
         
         filter_query = {"user_id": user_id}
         if unread_only:
             filter_query["is_read"] = False
         
-        # Execute query using ensure_connection
         db = await ensure_connection()
-        notifications_collection = db.notifications
-        result = notifications_collection.find(filter_query)
-        if asyncio.iscoroutine(result):
-            result = await result
-        try:
-            cursor = result.sort("created_at", -1).limit(limit)
-        except Exception:
-            cursor = result
-        # Try async iteration first, with robust fallback for mocks
-        try:
-            items: List[Notification] = []
-            async for doc in cursor:  # type: ignore[operator]
-                items.append(Notification(**doc))
-            return items
-        except TypeError:
-            # Some mocks return list from __aiter__ directly
-            ait = getattr(cursor, "__aiter__", None)
-            if callable(ait):
-                maybe_list = None
-                try:
-                    maybe_list = ait()
-                    if asyncio.iscoroutine(maybe_list):
-                        maybe_list = await maybe_list
-                except Exception:
-                    maybe_list = None
-                if isinstance(maybe_list, list):
-                    return [Notification(**doc) for doc in maybe_list]
-            # Fallback to normal iteration
-            if hasattr(cursor, "__iter__"):
-                return [Notification(**doc) for doc in cursor]
-            return []
+        # batch_size == limit fetches the whole page in a single round-trip
+        cursor = (
+            db.notifications.find(filter_query)
+            .sort("created_at", -1)
+            .limit(limit)
+            .batch_size(limit)
+        )
+        async for doc in cursor:
+            # Stored documents were validated on write
+            yield Notification.model_construct(**doc)
+    
+    async def get_user_notifications(
+        self,
+        user_id: str | ObjectId,
+        limit: int = 50,
+        unread_only: bool = False
+    ) -> List[Notification]:
+        """Get notifications for a specific user."""
+        return [
+            notification
+            async for notification in self.iter_user_notifications(user_id, limit, unread_only)
+        ]
     
     async def mark_as_read(
         self,
@@ -344,7 +459,7 @@ class NotificationService:
         if isinstance(notification_id, str):
             notification_id = ObjectId(notification_id)
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
         
         db = await ensure_connection()
         notifications_collection = db.notifications
@@ -357,16 +472,44 @@ class NotificationService:
                 }
             }
         )
+        # The filter also matches already-read notifications, so the change
+        # to the unread count is unknown
+        _unread_counts.pop(user_id, None)
         
         return result.modified_count > 0
     
+    async def mark_many_as_read(
+        self,
+        notification_ids: List[str | ObjectId],
+        user_id: str | ObjectId
+    ) -> int:
+        """Mark the given notifications as read in one update; returns how many changed."""
+        if isinstance(user_id, str):
+            user_id = _user_object_id(user_id)
+        ids = [ObjectId(nid) if isinstance(nid, str) else nid for nid in notification_ids]
+        if not ids:
+            return 0
+        
+        db = await ensure_connection()
+        result = await db.notifications.update_many(
+            {"_id": {"$in": ids}, "user_id": user_id, "is_read": False},
+            {
+                "$set": {
+                    "is_read": True,
+                    "read_at": datetime.utcnow()
+                }
+            }
+        )
+        _adjust_unread_count(user_id, -result.modified_count)
+        return result.modified_count
+    
     async def mark_all_as_read(
         self,
         user_id: str | ObjectId
     ) -> int:
         """Mark all notifications as read for a user."""
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
         
         db = await ensure_connection()
         notifications_collection = db.notifications
@@ -379,6 +522,7 @@ class NotificationService:
                 }
             }
         )
+        _cache_unread_count(user_id, 0)
         modified = getattr(result, "modified_count", 0)
         if hasattr(modified, "__call__"):
             modified = modified()
@@ -401,7 +545,7 @@ class NotificationService:
         if isinstance(notification_id, str):
             notification_id = ObjectId(notification_id)
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
         
         db = await ensure_connection()
         notifications_collection = db.notifications
@@ -409,32 +553,45 @@ class NotificationService:
             "_id": notification_id,
             "user_id": user_id
         })
+        _unread_counts.pop(user_id, None)
         
         return result.deleted_count > 0
     
     async def get_unread_count(self, user_id: str | ObjectId) -> int:
-        """Get count of unread notifications for a user."""
+        """Get count of unread notifications for a user.
+
+        The count stops at ``UNREAD_COUNT_LIMIT``; badges only need to know
+        that there are "many", and a cap keeps the index scan bounded.
+        Counts are cached per user and kept current by this service's writes.
+        """
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
+        cached = _cached_unread_count(user_id)
+        if cached is not None:
+            return cached
         
         db = await ensure_connection()
         notifications_collection = db.notifications
         count = await notifications_collection.count_documents({
             "user_id": user_id,
             "is_read": False
-        })
+        }, limit=UNREAD_COUNT_LIMIT)
         try:
             fallback = getattr(notifications_collection.count_documents, "return_value", None)
             if isinstance(fallback, int):
-                return max(int(count) if isinstance(count, int) else 0, fallback)
+                return _cache_unread_count(user_id, max(int(count) if isinstance(count, int) else 0, fallback))
         except Exception:
             pass
-        return int(count) if isinstance(count, int) else 0
+        return _cache_unread_count(user_id, int(count) if isinstance(count, int) else 0)
     
     async def get_or_create_settings(self, user_id: str | ObjectId) -> NotificationSettings:
         """Get or create notification settings for a user."""
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
+        
+        cached = _cached_settings(user_id)
+        if cached is not None:
+            return cached
         
         db = await ensure_connection()
         settings_collection = db.notification_settings
@@ -451,25 +608,70 @@ class NotificationService:
         if not settings:
             # Create default settings
             default_settings = NotificationSettings(user_id=user_id)
-            result = await settings_collection.insert_one(
-                default_settings.model_dump(by_alias=True)
-            )
+            result = await settings_collection.insert_one(_to_document(default_settings))
             default_settings.id = result.inserted_id
-            return default_settings
-        
-        # Construct explicitly to avoid mocks dropping fields
-        return NotificationSettings(
-            id=settings.get("_id"),
-            user_id=settings.get("user_id"),
-            email_notifications=bool(settings.get("email_notifications", True)),
-            push_notifications=bool(settings.get("push_notifications", True)),
-            bin_status_notifications=bool(settings.get("bin_status_notifications", True)),
-            achievement_notifications=bool(settings.get("achievement_notifications", True)),
-            system_notifications=bool(settings.get("system_notifications", True)),
-            reward_notifications=bool(settings.get("reward_notifications", True)),
-            quiet_hours_start=int(settings.get("quiet_hours_start", 22)),
-            quiet_hours_end=int(settings.get("quiet_hours_end", 7)),
-        )
+            return _cache_settings(default_settings)
+        
+        return _cache_settings(_settings_from_doc(settings))
+    
+    async def get_or_create_settings_bulk(
+        self,
+        user_ids: List[ObjectId]
+    ) -> Dict[ObjectId, NotificationSettings]:
+        """Get notification settings for many users, creating missing defaults.
+
+        Uses one ``find`` for the existing settings and one ``insert_many``
+        for the users that have none yet.
+        """
+        settings_by_user, missing = await self._find_settings_bulk(user_ids)
+        await self._insert_default_settings(missing)
+        settings_by_user.update((settings.user_id, settings) for settings in missing)
+        return settings_by_user
+    
+    async def _find_settings_bulk(
+        self,
+        user_ids: List[ObjectId]
+    ) -> Tuple[Dict[ObjectId, NotificationSettings], List[NotificationSettings]]:
+        """Look up stored settings; users without any get unsaved defaults."""
+        settings_by_user: Dict[ObjectId, NotificationSettings] = {}
+        uncached = []
+        for user_id in dict.fromkeys(user_ids):
+            cached = _cached_settings(user_id)
+            if cached is not None:
+                settings_by_user[user_id] = cached
+            else:
+                uncached.append(user_id)
+        if not uncached:
+            return settings_by_user, []
+        
+        db = await ensure_connection()
+        async for doc in db.notification_settings.find({"user_id": {"$in": uncached}}):
+            settings_by_user[doc["user_id"]] = _cache_settings(_settings_from_doc(doc))
+        
+        missing = [
+            NotificationSettings(user_id=user_id)
+            for user_id in uncached
+            if user_id not in settings_by_user
+        ]
+        return settings_by_user, missing
+    
+    async def _insert_default_settings(self, missing: List[NotificationSettings]) -> None:
+        """Store default settings built by ``_find_settings_bulk`` in one write."""
+        if not missing:
+            return
+        db = await ensure_connection()
+        try:
+            result = await db.notification_settings.insert_many(
+                [_to_document(settings) for settings in missing],
+                ordered=False,
+            )
+        except BulkWriteError:
+            # A concurrent request created some of them first (user_id is
+            # unique); the stored documents are picked up on the next lookup
+            return
+        for settings, inserted_id in zip(missing, result.inserted_ids):
+            settings.id = inserted_id
+            _cache_settings(settings)
     
     async def update_settings(
         self,
@@ -478,7 +680,7 @@ class NotificationService:
     ) -> NotificationSettings:
         """Update notification settings for a user."""
         if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
+            user_id = _user_object_id(user_id)
         
         # Remove None values
         update_data = {k: v for k, v in kwargs.items() if v is not None}
@@ -489,6 +691,7 @@ class NotificationService:
             {"user_id": user_id},
             {"$set": update_data}
         )
+        _settings_cache.pop(user_id, None)
         modified = getattr(result, "modified_count", 0)
         if hasattr(modified, "__call__"):
             modified = modified()
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from bson import ObjectId
 
 from ..models.statistics import PersonalStatistics, StatisticsSummary
 from ..db.mongo import ensure_connection
 
+# Per-user statistics version, bumped whenever a valid scan is stored so
+# clients can revalidate personal statistics without a recompute
+_statistics_versions: Dict[str, int] = {}
+
+
+def get_statistics_version(user_email: str) -> int:
+    """Return the current statistics version for ``user_email``."""
+    return _statistics_versions.get(user_email, 0)
+
+
+def bump_statistics_version(user_email: str) -> None:
+    """Invalidate cached statistics for ``user_email`` after a new scan."""
+    _statistics_versions[user_email] = _statistics_versions.get(user_email, 0) + 1
+
 
 class StatisticsService:
     """Service for calculating and managing user statistics."""
@@ -31,7 +45,7 @@ class StatisticsService:
                 user_obj_id = ObjectId(user_id)
             else:
                 user_obj_id = user_id
-            user_doc = await users_collection.find_one({"_id": user_obj_id})
+            user_doc = await users_collection.find_one({"_id": user_obj_id}, {"email": 1})
             if not user_doc:
                 return StatisticsSummary(
                     total_bottles=0,
@@ -261,7 +275,7 @@ class StatisticsService:
         )
     
     async def get_user_rankings(self, limit: int = 10) -> list[dict]:
-        """Get top users by total bottles recycled."""
+        """Get top users by total bottles recycled, each with its 1-based ``rank``."""
         try:
             scans_collection, users_collection, _ = await self._get_collections()
             
@@ -274,6 +288,11 @@ class StatisticsService:
                 }},
                 {"$sort": {"total_bottles": -1}},
                 {"$limit": limit},
+                # Number the page in the database (1..n in sort order)
+                {"$setWindowFields": {
+                    "sortBy": {"total_bottles": -1},
+                    "output": {"rank": {"$documentNumber": {}}}
+                }},
                 {"$lookup": {
                     "from": "users",
                     "localField": "_id",
@@ -281,11 +300,15 @@ class StatisticsService:
                     "as": "user_info"
                 }},
                 {"$unwind": {"path": "$user_info", "preserveNullAndEmptyArrays": True}},
+                # Rows leave MongoDB in the exact UserRankingResponse shape; the
+                # grouping key (the user's email) is not sent back
                 {"$project": {
+                    "_id": 0,
                     "user_id": {"$toString": "$user_info._id"},
                     "name": {"$ifNull": ["$user_info.name", "$_id"]},
                     "total_bottles": 1,
-                    "total_points": 1
+                    "total_points": 1,
+                    "rank": 1
                 }}
             ]
             
@@ -64,7 +64,8 @@ class TransactionServiceImpl(TransactionService):
         self, 
         user_id: str, 
         limit: int = 20, 
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[str] = None
     ) -> List[TransactionResponse]:
         """Get paginated transaction history for a user."""
         try:
@@ -83,7 +84,7 @@ class TransactionServiceImpl(TransactionService):
             
             # Get transactions from repository
             transactions = await self.transaction_repository.get_transactions_by_user_id(
-                user_id, limit, offset
+                user_id, limit, offset, after
             )
             
             # Convert to response models
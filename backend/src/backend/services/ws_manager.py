@@ -1,14 +1,64 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
-from typing import Dict, Set, Optional, Any
+import time
+from typing import Dict, List, Set, Optional, Any, Union
 from fastapi import WebSocket
-from datetime import datetime
+from datetime import datetime, timezone
+
+import orjson
+from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on in-flight socket writes across all fan-outs
+MAX_CONCURRENT_SENDS = 100
+# A socket that cannot take a frame within this window is treated as dead
+SEND_TIMEOUT_SECONDS = 5.0
+# Sockets enqueued per fan-out batch before yielding back to the event loop
+BROADCAST_BATCH_SIZE = 50
+# Frames a connection may have pending before it is treated as too slow
+OUTBOX_MAX_FRAMES = 256
+# "Try again later": the client reconnects and resynchronises from scratch
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+
+# Timestamps across the backend come from datetime.utcnow(), so naive
+# datetimes are tagged as UTC; numpy scalars come from OpenCV measurements
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+
+def encode_message(message: Any) -> str:
+    """Encode a WebSocket payload as a JSON text frame using orjson."""
+    return orjson.dumps(message, option=_ORJSON_OPTIONS).decode()
+
+
+# Frame timestamps have one-second resolution; the ISO string for the
+# current second is rendered once and shared by every frame built in it
+_timestamp_cache: List[Any] = [-1, ""]
+
+
+def current_timestamp() -> str:
+    """Return the current UTC time as a naive ISO string, truncated to the second."""
+    second = int(time.time())
+    if second != _timestamp_cache[0]:
+        now = datetime.fromtimestamp(second, timezone.utc).replace(tzinfo=None)
+        _timestamp_cache[0], _timestamp_cache[1] = second, now.isoformat()
+    return _timestamp_cache[1]
+
+
+def _notification_payload(notification: Union[dict, BaseModel]) -> Any:
+    """Embed a response model in a frame without re-validating or re-encoding it.
+
+    Outbound models are trusted server data, so pydantic-core serialises them
+    straight to JSON bytes which orjson splices into the envelope as-is.
+    """
+    if isinstance(notification, BaseModel):
+        return orjson.Fragment(notification.model_dump_json())
+    return notification
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time notifications."""
     
@@ -17,6 +67,13 @@ class ConnectionManager:
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # Map WebSocket to user_id for cleanup
         self.connection_users: Dict[WebSocket, str] = {}
+        # Per-connection outbound queues, each drained by its own writer task
+        self.outboxes: Dict[WebSocket, asyncio.Queue] = {}
+        self.writers: Dict[WebSocket, asyncio.Task] = {}
+        # Backpressure for fan-out so one broadcast cannot flood the event loop
+        self._send_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        # Close handshakes for dropped clients, referenced until they finish
+        self._closing: Set[asyncio.Task] = set()
     
     async def connect(self, websocket: WebSocket, user_id: str):
         """Connect a new WebSocket client."""
@@ -28,13 +85,17 @@ class ConnectionManager:
         self.active_connections[user_id].add(websocket)
         self.connection_users[websocket] = user_id
         
+        outbox: asyncio.Queue = asyncio.Queue(maxsize=OUTBOX_MAX_FRAMES)
+        self.outboxes[websocket] = outbox
+        self.writers[websocket] = asyncio.create_task(self._writer(websocket, outbox))
+        
         logger.info(f"User {user_id} connected. Total connections: {len(self.active_connections)}")
         
         # Send connection confirmation
         await self.send_personal_message({
             "type": "connection_established",
             "message": "Connected to notification service",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": current_timestamp()
         }, websocket)
     
     def disconnect(self, websocket: WebSocket):
@@ -48,64 +109,126 @@ class ConnectionManager:
             
             del self.connection_users[websocket]
             logger.info(f"User {user_id} disconnected. Total connections: {len(self.active_connections)}")
+        
+        self.outboxes.pop(websocket, None)
+        writer = self.writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send a message to a specific WebSocket client."""
+        await self.send_personal_frame(encode_message(message), websocket)
+    
+    async def send_personal_frame(self, frame: str, websocket: WebSocket):
+        """Send a pre-encoded frame to a specific WebSocket client.
+
+        Connected clients get the frame through their outbox, which keeps the
+        writer task the only one writing to the socket and preserves order.
+        """
+        if websocket in self.outboxes:
+            self._enqueue(websocket, frame)
+            return
+        
         try:
-            await websocket.send_text(json.dumps(message))
+            await websocket.send_text(frame)
         except Exception as e:
             logger.error(f"Failed to send message to WebSocket: {e}")
             # Mark for cleanup
             self.disconnect(websocket)
     
-    async def send_notification_to_user(self, user_id: str, notification: dict):
+    def _enqueue(self, websocket: WebSocket, frame: str):
+        """Queue a frame for a connection, dropping the connection if its outbox is full."""
+        outbox = self.outboxes.get(websocket)
+        if outbox is None:
+            return
+        try:
+            outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            logger.warning(f"Outbox full for user {self.connection_users.get(websocket)}; disconnecting slow client")
+            self._drop(websocket)
+    
+    def _drop(self, websocket: WebSocket):
+        """Disconnect a client and close its socket so it notices and reconnects."""
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def _close(self, websocket: WebSocket):
+        """Close a dropped socket, giving up if the close itself stalls."""
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=SLOW_CLIENT_CLOSE_CODE, reason="Too slow"),
+                timeout=SEND_TIMEOUT_SECONDS,
+            )
+        except Exception as e:
+            logger.debug(f"Failed to close dropped WebSocket: {e!r}")
+    
+    async def _writer(self, websocket: WebSocket, outbox: asyncio.Queue):
+        """Drain one connection's outbox so senders never wait on its socket.
+
+        A send that fails or stalls past ``SEND_TIMEOUT_SECONDS`` disconnects
+        the client.
+        """
+        while True:
+            frame = await outbox.get()
+            try:
+                async with self._send_semaphore:
+                    await asyncio.wait_for(websocket.send_text(frame), timeout=SEND_TIMEOUT_SECONDS)
+            except Exception as e:
+                logger.error(f"Failed to send to user {self.connection_users.get(websocket)}: {e!r}")
+                self._drop(websocket)
+                return
+            finally:
+                outbox.task_done()
+    
+    async def drain(self):
+        """Wait until every queued frame has been handed to its socket."""
+        await asyncio.gather(*(outbox.join() for outbox in list(self.outboxes.values())))
+    
+    async def _fan_out(self, frame: str, targets: List[WebSocket]):
+        """Queue one pre-encoded frame for many connections.
+
+        Each connection's writer task performs the actual send, so a slow or
+        dead socket never delays the caller or the other recipients.
+        """
+        # Large audiences are enqueued in batches, yielding to the event loop
+        # in between so HTTP requests and new connections are not starved
+        for start in range(0, len(targets), BROADCAST_BATCH_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            for websocket in targets[start:start + BROADCAST_BATCH_SIZE]:
+                self._enqueue(websocket, frame)
+    
+    async def send_notification_to_user(self, user_id: str, notification: Union[dict, BaseModel]):
         """Send a notification to a specific user's connections."""
         if user_id not in self.active_connections:
             return
         
         message = {
             "type": "notification",
-            "data": notification,
-            "timestamp": datetime.utcnow().isoformat()
+            "data": _notification_payload(notification),
+            "timestamp": current_timestamp()
         }
         
         # Send to all connections of the user
-        connections_to_remove = set()
-        for websocket in self.active_connections[user_id]:
-            try:
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Failed to send notification to user {user_id}: {e}")
-                connections_to_remove.add(websocket)
-        
-        # Clean up failed connections
-        for websocket in connections_to_remove:
-            self.disconnect(websocket)
+        await self._fan_out(encode_message(message), list(self.active_connections[user_id]))
     
-    async def broadcast_notification(self, notification: dict, exclude_user: Optional[str] = None):
+    async def broadcast_notification(self, notification: Union[dict, BaseModel], exclude_user: Optional[str] = None):
         """Broadcast a notification to all connected users."""
         message = {
             "type": "broadcast_notification",
-            "data": notification,
-            "timestamp": datetime.utcnow().isoformat()
+            "data": _notification_payload(notification),
+            "timestamp": current_timestamp()
         }
         
-        connections_to_remove = set()
-        
-        for user_id, connections in self.active_connections.items():
-            if exclude_user and user_id == exclude_user:
-                continue
-                
-            for websocket in connections:
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Failed to broadcast to user {user_id}: {e}")
-                    connections_to_remove.add(websocket)
-        
-        # Clean up failed connections
-        for websocket in connections_to_remove:
-            self.disconnect(websocket)
+        targets = [
+            websocket
+            for user_id, connections in self.active_connections.items()
+            if not (exclude_user and user_id == exclude_user)
+            for websocket in connections
+        ]
+        await self._fan_out(encode_message(message), targets)
     
     async def send_system_message(self, message: str, priority: str = "info"):
         """Send a system message to all connected users."""
@@ -115,7 +238,7 @@ class ConnectionManager:
                 "message": message,
                 "priority": priority
             },
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": current_timestamp()
         }
         
         await self.broadcast_notification(system_message)
@@ -128,7 +251,7 @@ class ConnectionManager:
                 "bin_id": bin_id,
                 "status": status,
                 "location": location,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": current_timestamp()
             }
         }
         
@@ -139,7 +262,7 @@ class ConnectionManager:
         achievement_message = {
             "type": "achievement",
             "data": achievement,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": current_timestamp()
         }
         
         await self.send_notification_to_user(user_id, achievement_message)
@@ -149,7 +272,7 @@ class ConnectionManager:
         reward_message = {
             "type": "reward",
             "data": reward,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": current_timestamp()
         }
         
         await self.send_notification_to_user(user_id, reward_message)
@@ -161,7 +284,7 @@ class ConnectionManager:
             "data": {
                 "rank": rank,
                 "total_users": total_users,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": current_timestamp()
             }
         }
         
@@ -194,22 +317,10 @@ class ConnectionManager:
         """Send ping to all connections to keep them alive."""
         ping_message = {
             "type": "ping",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": current_timestamp()
         }
         
-        connections_to_remove = set()
-        
-        for user_id, connections in self.active_connections.items():
-            for websocket in connections:
-                try:
-                    await websocket.send_text(json.dumps(ping_message))
-                except Exception as e:
-                    logger.error(f"Failed to ping user {user_id}: {e}")
-                    connections_to_remove.add(websocket)
-        
-        # Clean up failed connections
-        for websocket in connections_to_remove:
-            self.disconnect(websocket)
+        await self._fan_out(encode_message(ping_message), list(self.connection_users))
     
     async def start_ping_loop(self):
         """Start a background loop to ping connections every 30 seconds."""
@@ -249,6 +360,10 @@ async def stop_websocket_manager():
                 logger.error(f"Error closing WebSocket for user {user_id}: {e}")
     
     # Clear all connections
+    for writer in manager.writers.values():
+        writer.cancel()
+    manager.writers.clear()
+    manager.outboxes.clear()
     manager.active_connections.clear()
     manager.connection_users.clear()
     
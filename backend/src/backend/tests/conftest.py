@@ -0,0 +1,48 @@
+"""Shared fixtures for backend tests."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class AsyncCursor:
+    """Stand-in for a Motor cursor over a fixed list of documents.
+
+    The list is read when iteration starts, so tests may append to it after
+    the cursor is created. Each document is yielded as a copy.
+    """
+
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    def batch_size(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self._docs:
+                yield dict(doc)
+        return gen()
+
+
+@pytest.fixture
+def mongo_cursor():
+    """Factory building an ``AsyncCursor`` over the given documents."""
+    return AsyncCursor
+
+
+@pytest.fixture
+def mongo_collection():
+    """Factory building a collection mock whose ``find`` returns an ``AsyncCursor``."""
+    def make(docs=()):
+        docs = docs if isinstance(docs, list) else list(docs)
+        collection = MagicMock()
+        collection.find = MagicMock(side_effect=lambda *args, **kwargs: AsyncCursor(docs))
+        return collection
+    return make
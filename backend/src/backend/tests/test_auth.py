@@ -5,9 +5,13 @@ from pathlib import Path
 from typing import Any
 
 import json
+from datetime import timedelta
+from unittest.mock import patch
+
 import pytest
 import httpx
-from fastapi import status
+from fastapi import HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.testclient import TestClient
 
 # ---------------------------------------------------------------------------
@@ -55,3 +59,82 @@ def test_auth_endpoints_registered():
     assert "/auth/google/callback" in paths
     assert "/auth/me" in paths
     assert "/auth/refresh" in paths
+
+
+def test_verify_token_reuses_verified_payload(monkeypatch):
+    """A token verified once is served from cache without decoding again."""
+    monkeypatch.setattr(auth_router, "_JWT_SECRET", b"test-secret")
+    auth_router._token_cache.clear()
+    token = auth_router.create_access_token({"sub": "user-1"}, expires_delta=timedelta(minutes=5))
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    first = auth_router.verify_token(credentials)
+    with patch.object(auth_router.jwt, "decode", side_effect=AssertionError("decoded twice")):
+        second = auth_router.verify_token(credentials)
+
+    assert second == first
+    assert second is not first
+
+
+def test_verify_token_does_not_cache_failures(monkeypatch):
+    """Invalid tokens are rejected every time and never stored."""
+    monkeypatch.setattr(auth_router, "_JWT_SECRET", b"test-secret")
+    auth_router._token_cache.clear()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-jwt")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            auth_router.verify_token(credentials)
+        assert exc_info.value.status_code == 401
+    assert not auth_router._token_cache
+
+
+def test_access_token_reused_within_window(monkeypatch):
+    """Identical claims issued back to back share one signed token."""
+    monkeypatch.setattr(auth_router, "_JWT_SECRET", b"test-secret")
+    monkeypatch.setattr(auth_router.settings, "JWT_TOKEN_REUSE_SECONDS", 60)
+    auth_router._issued_tokens.clear()
+    claims = {"sub": "user-1", "email": "user@example.com", "role": "user"}
+
+    first = auth_router.create_access_token(data=claims)
+    with patch.object(auth_router.jwt, "encode", side_effect=AssertionError("signed twice")):
+        assert auth_router.create_access_token(data=dict(claims)) == first
+
+    promoted = auth_router.create_access_token(data={**claims, "role": "admin"})
+    assert promoted != first
+
+
+def test_access_token_exp_is_integer_epoch(monkeypatch):
+    """exp is an integer epoch offset by the requested lifetime."""
+    monkeypatch.setattr(auth_router, "_JWT_SECRET", b"test-secret")
+    monkeypatch.setattr(auth_router.time, "time", lambda: 1_700_000_000.7)
+
+    token = auth_router.create_access_token({"sub": "user-1"}, expires_delta=timedelta(minutes=5))
+    claims = auth_router.jwt.decode(token, options={"verify_signature": False})
+
+    assert claims["exp"] == 1_700_000_300
+
+
+def test_expired_token_rejected_before_signature_check(monkeypatch):
+    """Expired tokens fail with 401 'Token expired' without a verifying decode."""
+    monkeypatch.setattr(auth_router, "_JWT_SECRET", b"test-secret")
+    auth_router._token_cache.clear()
+    token = auth_router.jwt.encode({"sub": "user-1", "exp": 1_000_000_000}, b"other-secret", algorithm="HS256")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    with pytest.raises(HTTPException) as exc_info:
+        auth_router.verify_token(credentials)
+
+    assert exc_info.value.detail == "Token expired"
+
+
+@pytest.mark.parametrize("token", ["not-a-jwt", "a.!!!.c", "a.WzFd.c"])
+def test_malformed_token_payload_rejected(monkeypatch, token):
+    """Tokens whose payload segment is not a base64 JSON object are invalid."""
+    monkeypatch.setattr(auth_router, "_JWT_SECRET", b"test-secret")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    with pytest.raises(HTTPException) as exc_info:
+        auth_router.verify_token(credentials)
+
+    assert exc_info.value.detail == "Invalid token"
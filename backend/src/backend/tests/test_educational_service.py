@@ -0,0 +1,125 @@
+"""Test educational content service."""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+
+from ..models.educational import EducationalContent
+from ..services.educational_service import EducationalService, get_educational_service
+
+
+@pytest.mark.asyncio
+async def test_collection_handle_resolved_once():
+    """CRUD calls share one collection handle instead of pinging Mongo each time."""
+    collection = MagicMock()
+    collection.find_one = AsyncMock(return_value=None)
+    collection.delete_one = AsyncMock(return_value=MagicMock(deleted_count=1))
+    db = MagicMock(educational_contents=collection)
+    mock_ensure = AsyncMock(return_value=db)
+    service = EducationalService()
+
+    with patch("src.backend.services.educational_service.ensure_connection", mock_ensure):
+        assert await service.get_by_slug("missing") is None
+        assert await service.delete("507f1f77bcf86cd799439011") is True
+
+    mock_ensure.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_seed_uses_single_bulk_upsert():
+    """Seeding sends one unordered bulk write of insert-only upserts keyed by slug."""
+    collection = MagicMock()
+    collection.bulk_write = AsyncMock()
+    service = EducationalService()
+    service._collection = collection
+
+    await service.seed_initial_education_contents()
+
+    collection.bulk_write.assert_awaited_once()
+    operations = collection.bulk_write.await_args.args[0]
+    assert collection.bulk_write.await_args.kwargs == {"ordered": False}
+    assert all(op._doc.keys() == {"$setOnInsert"} for op in operations)
+    assert {op._filter["slug"] for op in operations} == {op._doc["$setOnInsert"]["slug"] for op in operations}
+
+
+@pytest.mark.asyncio
+async def test_stored_documents_built_without_validation():
+    """Documents read back from Mongo keep their _id and bypass model validation."""
+    doc = {"_id": ObjectId(), "title": "Plastik", "content": "Isi", "slug": "plastik", "created_at": datetime(2024, 1, 15)}
+    collection = MagicMock()
+    collection.find_one = AsyncMock(return_value=doc)
+    service = EducationalService()
+    service._collection = collection
+
+    with patch.object(EducationalContent, "model_validate", side_effect=AssertionError("validated")):
+        item = await service.get_by_slug("plastik")
+
+    assert item.id == doc["_id"]
+    assert item.description == ""
+    assert item.category == "article"
+
+
+def test_slugify_collapses_separator_runs():
+    """Any run of non-alphanumeric characters becomes a single dash."""
+    service = EducationalService()
+
+    assert service._slugify("Kenapa Botol -- Plastik?!") == "kenapa-botol-plastik"
+    assert service._slugify("  Café_au lait 2024 ") == "café-au-lait-2024"
+
+
+@pytest.mark.asyncio
+async def test_list_normalises_documents_in_pipeline():
+    """Listings page and fill defaults in MongoDB, deriving only a missing slug locally."""
+    doc = {"_id": ObjectId(), "title": "Tips Rumah Hijau", "description": "d", "content": "c",
+           "category": "article", "created_at": datetime(2024, 1, 15)}
+
+    collection = MagicMock()
+    collection.aggregate.return_value.to_list = AsyncMock(return_value=[dict(doc)])
+    service = EducationalService()
+    service._collection = collection
+
+    items = await service.list(limit=10, skip=20, filters={"is_published": True})
+
+    pipeline = collection.aggregate.call_args.args[0]
+    assert pipeline[:4] == [{"$match": {"is_published": True}}, {"$sort": {"created_at": -1}}, {"$skip": 20}, {"$limit": 10}]
+    assert "$set" in pipeline[4]
+    assert items[0].slug == "tips-rumah-hijau"
+    assert items[0].id == doc["_id"]
+    collection.aggregate.return_value.to_list.assert_awaited_once_with(length=10)
+
+
+def test_get_educational_service_returns_singleton():
+    """The factory hands every caller the same instance."""
+    assert get_educational_service() is get_educational_service()
+
+
+@pytest.mark.asyncio
+async def test_create_inserts_all_fields_except_id():
+    """Created documents keep defaulted fields such as timestamps and drop the model id."""
+    collection = MagicMock()
+    collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+    service = EducationalService()
+    service._collection = collection
+
+    await service.create({"title": "Plastik", "description": "d", "content": "c", "slug": "plastik"})
+
+    document = collection.insert_one.await_args.args[0]
+    assert "id" not in document and "_id" not in document
+    assert document.keys() == EducationalContent.model_fields.keys() - {"id"}
+    assert isinstance(document["created_at"], datetime)
+
+
+def test_normalize_doc_fills_only_missing_fields():
+    """Legacy documents get defaults; present fields are left as stored."""
+    service = EducationalService()
+
+    normalized = service._normalize_doc({"title": "Tips Kompos", "content_type": "tip", "is_published": False})
+
+    assert normalized["slug"] == "tips-kompos"
+    assert normalized["category"] == "tutorial"
+    assert normalized["is_published"] is False
+    assert normalized["description"] == "" and normalized["content"] == ""
+    with patch.object(service, "_slugify", side_effect=AssertionError("slugified")):
+        assert service._normalize_doc({"title": "A", "slug": ""})["slug"] == ""
@@ -0,0 +1,103 @@
+"""Test ESP32 router functionality."""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from ..routers import esp32
+from ..routers.esp32 import get_pending_commands, queue_command_for_esp32
+
+
+def _mock_db(commands):
+    db = MagicMock()
+    db.__getitem__.return_value = commands
+    commands.insert_one = AsyncMock()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_pending_commands_poll_is_served_from_cache(mongo_collection):
+    """Polls inside the TTL window reuse the previous answer."""
+    esp32._invalidate_pending_commands()
+    commands = mongo_collection([])
+    db = _mock_db(commands)
+
+    with patch("src.backend.routers.esp32.ensure_connection", AsyncMock(return_value=db)):
+        first = await get_pending_commands("ESP32-1")
+        second = await get_pending_commands("ESP32-1")
+
+    assert first == second == []
+    commands.find.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_queued_command_is_visible_on_next_poll(mongo_collection):
+    """Queuing a command drops the cached answer for that device."""
+    esp32._invalidate_pending_commands()
+    queued = {"_id": "c1", "device_id": "ESP32-1", "action": "open", "status": "pending",
+              "timestamp": datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc)}
+    docs = []
+    commands = mongo_collection(docs)
+    db = _mock_db(commands)
+
+    with patch("src.backend.routers.esp32.ensure_connection", AsyncMock(return_value=db)):
+        assert await get_pending_commands("ESP32-1") == []
+        await queue_command_for_esp32("ESP32-1", "open")
+        docs.append(queued)
+        polled = await get_pending_commands("ESP32-1")
+
+    assert [command["id"] for command in polled] == ["c1"]
+    assert commands.find.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_status_update_log_uses_audit_write_concern():
+    """Audit-log writes go through the w=1 collection handle."""
+    db = MagicMock()
+    logs = db.__getitem__.return_value.with_options.return_value
+    logs.insert_one = AsyncMock()
+    status_update = esp32.ESP32Status(device_id="ESP32-1", status="online", last_seen=datetime.now(timezone.utc))
+
+    with patch("src.backend.routers.esp32.ensure_connection", AsyncMock(return_value=db)):
+        await esp32.update_esp32_status(status_update, MagicMock())
+
+    logs.insert_one.assert_awaited_once()
+    write_concern = db.__getitem__.return_value.with_options.call_args.kwargs["write_concern"]
+    assert write_concern.document == {"w": 1, "j": False}
+
+
+@pytest.mark.asyncio
+async def test_lid_error_logging_failure_is_not_raised():
+    """A Mongo failure while recording a lid error is logged, not raised."""
+    with patch("src.backend.routers.esp32.ensure_connection", AsyncMock(side_effect=RuntimeError("down"))):
+        await esp32.handle_lid_close("ESP32-unknown", "65a4f0c2e1b2c3d4e5f60718")
+
+
+@pytest.mark.asyncio
+async def test_control_for_unregistered_device_skips_logging():
+    """Lid actions for unknown devices are rejected without touching Mongo."""
+    request = esp32.LidControlRequest(device_id="ESP32-unknown", action="open")
+
+    with patch("src.backend.routers.esp32.ensure_connection", AsyncMock()) as mock_connection:
+        with pytest.raises(HTTPException) as exc_info:
+            await esp32.control_lid(request, MagicMock())
+
+    assert exc_info.value.status_code == 404
+    mock_connection.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_pending_commands_cache_is_bounded(mongo_collection):
+    """Polls for many distinct device ids cannot grow the cache past its cap."""
+    esp32._invalidate_pending_commands()
+    db = _mock_db(mongo_collection([]))
+
+    with patch("src.backend.routers.esp32.ensure_connection", AsyncMock(return_value=db)), \
+            patch("src.backend.routers.esp32._PENDING_COMMANDS_CACHE_MAX", 3):
+        for index in range(10):
+            await get_pending_commands(f"ESP32-{index}")
+
+    assert len(esp32._pending_commands_cache) <= 3
+    esp32._invalidate_pending_commands()
@@ -0,0 +1,139 @@
+"""Test outbound IoT HTTP client handling."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import orjson
+import pytest
+
+from ..routers.scan import ESP32_CONTROL_TIMEOUT_SECONDS, control_esp32_lid
+from ..services import iot_client
+from ..services.esp32_log_writer import enqueue_esp32_log, stop_esp32_log_writer
+from ..services.iot_client import close_http_client, get_http_client
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_until_closed():
+    """Callers reuse one pooled client; closing it lets the next call start fresh."""
+    first = get_http_client()
+    assert get_http_client() is first
+
+    await close_http_client()
+
+    assert first.is_closed
+    assert iot_client._http_client is None
+    second = get_http_client()
+    assert second is not first
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_control_esp32_lid_uses_shared_client():
+    """Lid control posts through the shared client rather than opening a new one."""
+    db = MagicMock()
+    collection = db.__getitem__.return_value.with_options.return_value
+    collection.bulk_write = AsyncMock()
+    client = MagicMock()
+    client.post = AsyncMock(return_value=httpx.Response(200, content=b'{"ok": true}'))
+
+    with patch("src.backend.services.esp32_log_writer.ensure_connection", AsyncMock(return_value=db)), \
+            patch("src.backend.routers.scan.get_http_client", return_value=client):
+        result = await control_esp32_lid("ESP32-1", 3)
+        await stop_esp32_log_writer()
+
+    client.post.assert_awaited_once()
+    assert client.post.await_args.kwargs["timeout"] == ESP32_CONTROL_TIMEOUT_SECONDS
+    assert orjson.loads(client.post.await_args.kwargs["content"]) == {
+        "device_id": "ESP32-1", "action": "open", "duration_seconds": 3,
+    }
+    assert result["events"][0]["event"] == "lid_opened"
+    log_entry = collection.bulk_write.await_args.args[0][0]._doc
+    assert (log_entry["status"], str(log_entry["_id"])) == ("completed", result["action_id"])
+
+
+@pytest.mark.asyncio
+async def test_control_esp32_lid_failure_is_logged_once():
+    """A failed call is recorded with one write carrying the final status."""
+    db = MagicMock()
+    collection = db.__getitem__.return_value.with_options.return_value
+    collection.bulk_write = AsyncMock()
+    client = MagicMock()
+    client.post = AsyncMock(return_value=httpx.Response(503, text="busy"))
+
+    with patch("src.backend.services.esp32_log_writer.ensure_connection", AsyncMock(return_value=db)), \
+            patch("src.backend.routers.scan.get_http_client", return_value=client):
+        result = await control_esp32_lid("ESP32-1", 3)
+        await stop_esp32_log_writer()
+
+    assert result["events"] == ()
+    collection.bulk_write.assert_awaited_once()
+    assert collection.bulk_write.await_args.args[0][0]._doc["status"] == "error"
+    assert db.__getitem__.return_value.with_options.call_args.kwargs["write_concern"].document == {"w": 0}
+
+
+@pytest.mark.asyncio
+async def test_smartbin_open_and_close_share_client():
+    """Opening and closing the lid reuse the shared pooled client."""
+    client = MagicMock()
+    client.post = AsyncMock(return_value=httpx.Response(200, content=b"{}"))
+    smartbin = iot_client.SmartBinClient(esp32_ip="192.168.1.50")
+
+    with patch("src.backend.services.iot_client.get_http_client", return_value=client):
+        opened = await smartbin.open_bin("ESP32-1")
+        closed = await smartbin.close_bin("ESP32-1")
+
+    assert [event["event"] for event in opened] == ["lid_opened", "lid_closed"]
+    assert closed[0]["event"] == "lid_closed"
+    assert client.post.await_count == 2
+    assert all(call.kwargs["timeout"] is iot_client.DEVICE_TIMEOUT for call in client.post.await_args_list)
+
+
+@pytest.mark.asyncio
+async def test_esp32_logs_are_written_in_one_batch():
+    """Entries queued together reach Mongo as a single unordered bulk_write."""
+    db = MagicMock()
+    collection = db.__getitem__.return_value.with_options.return_value
+    collection.bulk_write = AsyncMock()
+
+    with patch("src.backend.services.esp32_log_writer.ensure_connection", AsyncMock(return_value=db)):
+        for index in range(3):
+            enqueue_esp32_log({"device_id": f"ESP32-{index}"})
+        await asyncio.sleep(0.1)
+        await stop_esp32_log_writer()
+
+    collection.bulk_write.assert_awaited_once()
+    ops = collection.bulk_write.await_args.args[0]
+    assert [op._doc["device_id"] for op in ops] == ["ESP32-0", "ESP32-1", "ESP32-2"]
+    assert collection.bulk_write.await_args.kwargs["ordered"] is False
+
+
+@pytest.mark.asyncio
+async def test_error_body_is_truncated():
+    """Only the start of a large error page is decoded into the error event."""
+    client = MagicMock()
+    client.post = AsyncMock(return_value=httpx.Response(500, content=b"x" * 10_000))
+    smartbin = iot_client.SmartBinClient(esp32_ip="192.168.1.50")
+
+    with patch("src.backend.services.iot_client.get_http_client", return_value=client):
+        events = await smartbin.close_bin("ESP32-1")
+
+    assert events[0]["error"] == "HTTP 500: " + "x" * iot_client.RESPONSE_EXCERPT_BYTES
+
+
+@pytest.mark.asyncio
+async def test_stop_writes_batch_being_gathered():
+    """Entries already pulled into a batch are written when shutdown interrupts the window."""
+    db = MagicMock()
+    collection = db.__getitem__.return_value.with_options.return_value
+    collection.bulk_write = AsyncMock()
+
+    with patch("src.backend.services.esp32_log_writer.ensure_connection", AsyncMock(return_value=db)), \
+            patch("src.backend.services.esp32_log_writer.LOG_FLUSH_INTERVAL_SECONDS", 10):
+        enqueue_esp32_log({"device_id": "ESP32-0"})
+        enqueue_esp32_log({"device_id": "ESP32-1"})
+        await asyncio.sleep(0.01)
+        await stop_esp32_log_writer()
+
+    ops = [op for call in collection.bulk_write.await_args_list for op in call.args[0]]
+    assert [op._doc["device_id"] for op in ops] == ["ESP32-0", "ESP32-1"]
@@ -0,0 +1,31 @@
+"""Test MongoDB index setup."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from ..db import mongo
+
+
+@pytest.mark.asyncio
+async def test_failed_index_does_not_skip_the_rest():
+    """A unique index that cannot be built is logged; every other index is still created."""
+    collections = {}
+
+    def collection(name):
+        if name not in collections:
+            collections[name] = MagicMock()
+            collections[name].create_index = AsyncMock(return_value="ok")
+        return collections[name]
+
+    db = MagicMock()
+    db.__getitem__.side_effect = collection
+    collection("educational_contents").create_index.side_effect = [RuntimeError("duplicate key"), "ok", "ok"]
+
+    with patch("src.backend.db.mongo.ensure_connection", AsyncMock(return_value=db)), \
+            patch.object(mongo.logger, "warning") as mock_warning:
+        await mongo.ensure_indexes()
+
+    assert sum(c.create_index.await_count for c in collections.values()) == len(mongo._INDEXES)
+    assert collections["notification_settings"].create_index.await_count == 1
+    assert "educational_contents" in mock_warning.call_args_list[0].args
@@ -0,0 +1,245 @@
+"""Test bulk paths in the notification service."""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from ..models.notification import NotificationSettings, quiet_hours_mask
+from ..schemas.notification import NotificationBulkRead
+from ..services.notification_service import UNREAD_COUNT_LIMIT, NotificationService
+
+
+@pytest.mark.asyncio
+async def test_bin_full_notifications_use_one_bulk_insert(mongo_collection):
+    """Opted-out users are skipped and the rest are inserted with one insert_many."""
+    users = [ObjectId() for _ in range(3)]
+    db = MagicMock()
+    db.users = mongo_collection({"_id": user_id} for user_id in users)
+    db.notification_settings = mongo_collection([{"_id": ObjectId(), "user_id": users[1], "bin_status_notifications": False}])
+    db.notification_settings.insert_many = AsyncMock(
+        return_value=SimpleNamespace(inserted_ids=[ObjectId(), ObjectId()])
+    )
+    inserted_ids = [ObjectId(), ObjectId()]
+    db.notifications.insert_many = AsyncMock(return_value=SimpleNamespace(inserted_ids=inserted_ids))
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        notifications = await NotificationService().create_bin_full_notification_for_all_users("BIN-1", "Lobby")
+
+    assert [notification.user_id for notification in notifications] == [users[0], users[2]]
+    db.notifications.insert_many.assert_awaited_once()
+    assert db.notifications.insert_many.await_args.kwargs["ordered"] is False
+    assert [doc["user_id"] for doc in db.notifications.insert_many.await_args.args[0]] == [users[0], users[2]]
+    assert [notification.id for notification in notifications] == inserted_ids
+    assert all(notification.priority == 3 and notification.bin_status == "full" for notification in notifications)
+
+
+@pytest.mark.asyncio
+async def test_settings_bulk_creates_only_missing_defaults(mongo_collection):
+    """Existing settings are reused and defaults are inserted in one call."""
+    known, new_a, new_b = ObjectId(), ObjectId(), ObjectId()
+    db = MagicMock()
+    db.notification_settings = mongo_collection([{"_id": ObjectId(), "user_id": known, "system_notifications": False}])
+    db.notification_settings.insert_many = AsyncMock(
+        return_value=SimpleNamespace(inserted_ids=[ObjectId(), ObjectId()])
+    )
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        settings = await NotificationService().get_or_create_settings_bulk([known, new_a, new_b, new_a])
+
+    assert set(settings) == {known, new_a, new_b}
+    assert settings[known].system_notifications is False
+    inserted = db.notification_settings.insert_many.await_args.args[0]
+    assert [doc["user_id"] for doc in inserted] == [new_a, new_b]
+    assert settings[new_a].id == db.notification_settings.insert_many.return_value.inserted_ids[0]
+
+
+@pytest.mark.asyncio
+async def test_settings_are_cached_until_updated():
+    """Repeated lookups skip Mongo; an update forces a fresh read."""
+    user_id = ObjectId()
+    db = MagicMock()
+    db.notification_settings.find_one = AsyncMock(return_value={"_id": ObjectId(), "user_id": user_id})
+    db.notification_settings.update_one = AsyncMock(return_value=SimpleNamespace(modified_count=1))
+    service = NotificationService()
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        first = await service.get_or_create_settings(user_id)
+        assert await service.get_or_create_settings(str(user_id)) is first
+        db.notification_settings.find_one.assert_awaited_once()
+
+        db.notification_settings.find_one.return_value = {
+            "_id": ObjectId(), "user_id": user_id, "reward_notifications": False,
+        }
+        updated = await service.update_settings(user_id, reward_notifications=False)
+
+    assert updated.reward_notifications is False
+    assert db.notification_settings.find_one.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_bin_full_stores_defaults_alongside_notifications(mongo_collection):
+    """Users without settings are notified and get default settings in the same fan-out."""
+    user_id = ObjectId()
+    db = MagicMock()
+    db.users = mongo_collection([{"_id": user_id}])
+    db.notification_settings = mongo_collection([])
+    db.notification_settings.insert_many = AsyncMock(return_value=SimpleNamespace(inserted_ids=[ObjectId()]))
+    db.notifications.insert_many = AsyncMock(return_value=SimpleNamespace(inserted_ids=[ObjectId()]))
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        notifications = await NotificationService().create_bin_full_notification_for_all_users("BIN-2")
+
+    assert [notification.user_id for notification in notifications] == [user_id]
+    assert db.notification_settings.insert_many.await_args.args[0][0]["user_id"] == user_id
+    db.notifications.insert_many.assert_awaited_once()
+
+
+def test_quiet_hours_mask_handles_wrap_and_plain_windows():
+    """Wrapped windows cover both sides of midnight; plain ones only their range."""
+    wrapped = quiet_hours_mask(22, 7)
+    plain = quiet_hours_mask(1, 5)
+
+    assert [hour for hour in range(24) if wrapped >> hour & 1] == [0, 1, 2, 3, 4, 5, 6, 7, 22, 23]
+    assert [hour for hour in range(24) if plain >> hour & 1] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("start, end, expected", [(1, 5, True), (10, 14, False), (22, 7, True), (11, 3, False)])
+@pytest.mark.asyncio
+async def test_should_send_notification_respects_quiet_hours(start, end, expected):
+    """Notifications at 12:00 UTC are held only inside the quiet window."""
+    settings = NotificationSettings(user_id=ObjectId(), quiet_hours_start=start, quiet_hours_end=end)
+    service = NotificationService()
+
+    with patch.object(service, "get_or_create_settings", AsyncMock(return_value=settings)), \
+            patch("src.backend.services.notification_service.datetime") as mock_datetime:
+        mock_datetime.now.return_value = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+        assert await service.should_send_notification(settings.user_id, "reward") is expected
+
+
+@pytest.mark.asyncio
+async def test_should_send_notification_honours_type_toggle():
+    """A disabled notification type is never sent; unknown types are not gated."""
+    settings = NotificationSettings(user_id=ObjectId(), achievement_notifications=False, quiet_hours_start=3, quiet_hours_end=3)
+    service = NotificationService()
+
+    with patch.object(service, "get_or_create_settings", AsyncMock(return_value=settings)), \
+            patch("src.backend.services.notification_service.datetime") as mock_datetime:
+        mock_datetime.now.return_value = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+        assert await service.should_send_notification(settings.user_id, "achievement") is False
+        assert await service.should_send_notification(settings.user_id, "reward") is True
+        assert await service.should_send_notification(settings.user_id, "other") is True
+
+
+@pytest.mark.asyncio
+async def test_unread_count_is_capped():
+    """The unread count query stops scanning at the reporting limit."""
+    db = MagicMock()
+    db.notifications.count_documents = AsyncMock(return_value=UNREAD_COUNT_LIMIT)
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        count = await NotificationService().get_unread_count(ObjectId())
+
+    assert count == UNREAD_COUNT_LIMIT
+    assert db.notifications.count_documents.await_args.kwargs["limit"] == UNREAD_COUNT_LIMIT
+
+
+@pytest.mark.asyncio
+async def test_create_notification_stores_user_id():
+    """The inserted document keeps user_id and leaves _id to Mongo."""
+    user_id, inserted_id = ObjectId(), ObjectId()
+    db = MagicMock()
+    db.notifications.insert_one = AsyncMock(return_value=SimpleNamespace(inserted_id=inserted_id))
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        notification = await NotificationService().create_reward_notification(str(user_id), points=10)
+
+    document = db.notifications.insert_one.await_args.args[0]
+    assert document["user_id"] == user_id
+    assert "id" not in document and "_id" not in document
+    assert notification.id == inserted_id
+
+
+@pytest.mark.asyncio
+async def test_user_notifications_fetch_one_batch_and_keep_ids(mongo_cursor):
+    """The page is requested in a single batch and stored ids map onto the right fields."""
+    user_id, notification_id = ObjectId(), ObjectId()
+    cursor = mongo_cursor([{"_id": notification_id, "user_id": user_id, "title": "t", "message": "m"}])
+    cursor.sort = MagicMock(return_value=cursor)
+    cursor.limit = MagicMock(return_value=cursor)
+    cursor.batch_size = MagicMock(return_value=cursor)
+    db = MagicMock()
+    db.notifications.find = MagicMock(return_value=cursor)
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        notifications = await NotificationService().get_user_notifications(str(user_id), limit=20, unread_only=True)
+
+    assert db.notifications.find.call_args.args[0] == {"user_id": user_id, "is_read": False}
+    cursor.batch_size.assert_called_once_with(20)
+    assert [(n.id, n.user_id) for n in notifications] == [(notification_id, user_id)]
+
+
+@pytest.mark.asyncio
+async def test_mark_many_as_read_uses_one_update():
+    """A selection of notifications is marked read with a single update_many."""
+    user_id, ids = ObjectId(), [ObjectId(), ObjectId()]
+    db = MagicMock()
+    db.notifications.update_many = AsyncMock(return_value=SimpleNamespace(modified_count=2))
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        count = await NotificationService().mark_many_as_read([str(i) for i in ids], str(user_id))
+
+    assert count == 2
+    query = db.notifications.update_many.await_args.args[0]
+    assert query == {"_id": {"$in": ids}, "user_id": user_id, "is_read": False}
+
+
+@pytest.mark.asyncio
+async def test_unread_count_is_cached_and_kept_current_by_writes():
+    """Polls after the first hit the cache; creates and reads adjust it without a recount."""
+    user_id = ObjectId()
+    db = MagicMock()
+    db.notifications.count_documents = AsyncMock(return_value=2)
+    db.notifications.insert_one = AsyncMock(return_value=SimpleNamespace(inserted_id=ObjectId()))
+    db.notifications.update_many = AsyncMock(return_value=SimpleNamespace(modified_count=2))
+    service = NotificationService()
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        assert await service.get_unread_count(user_id) == 2
+        await service.create_reward_notification(user_id, points=5)
+        assert await service.get_unread_count(str(user_id)) == 3
+        await service.mark_many_as_read([ObjectId(), ObjectId()], user_id)
+        assert await service.get_unread_count(user_id) == 1
+        await service.mark_all_as_read(user_id)
+        assert await service.get_unread_count(user_id) == 0
+
+    db.notifications.count_documents.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_default_settings_are_stored_with_user_id():
+    """Settings created on first lookup keep user_id so later lookups find them."""
+    user_id, inserted_id = ObjectId(), ObjectId()
+    db = MagicMock()
+    db.notification_settings.find_one = AsyncMock(return_value=None)
+    db.notification_settings.insert_one = AsyncMock(return_value=SimpleNamespace(inserted_id=inserted_id))
+
+    with patch("src.backend.services.notification_service.ensure_connection", AsyncMock(return_value=db)):
+        settings = await NotificationService().get_or_create_settings(user_id)
+
+    document = db.notification_settings.insert_one.await_args.args[0]
+    assert document["user_id"] == user_id
+    assert "id" not in document and "_id" not in document
+    assert settings.id == inserted_id
+
+
+def test_bulk_read_rejects_malformed_ids():
+    """A malformed id fails request validation instead of reaching the handler."""
+    valid = str(ObjectId())
+
+    assert NotificationBulkRead(notification_ids=[valid]).notification_ids == [valid]
+    with pytest.raises(ValidationError):
+        NotificationBulkRead(notification_ids=[valid, "not-an-id"])
@@ -0,0 +1,72 @@
+"""Test payout request schema validation."""
+
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from ..schemas.payout import PayoutMethodRequest, WithdrawalResponse
+
+
+class TestPayoutMethodRequest:
+    """Test payout method validators."""
+
+    def test_valid_bank_method(self):
+        """A supported bank with an 8-20 digit account number is accepted."""
+        request = PayoutMethodRequest(
+            method_type="bank",
+            bank_code="bca",
+            bank_account_number="1234567890",
+            bank_account_name="Budi",
+        )
+
+        assert request.bank_code == "BCA"
+
+    def test_short_bank_account_number_rejected(self):
+        """Account numbers shorter than 8 digits fail validation."""
+        with pytest.raises(ValidationError):
+            PayoutMethodRequest(
+                method_type="bank",
+                bank_code="BCA",
+                bank_account_number="1234",
+                bank_account_name="Budi",
+            )
+
+    @pytest.mark.parametrize("phone_number", ["081234567890", "6281234567890", "+6281234567890"])
+    def test_indonesian_phone_prefixes_accepted(self, phone_number):
+        """Phone numbers may start with 0, 62 or +62."""
+        request = PayoutMethodRequest(method_type="ewallet", ewallet_provider="ovo", phone_number=phone_number)
+
+        assert request.phone_number == phone_number
+
+    def test_invalid_phone_number_rejected(self):
+        """Numbers without an Indonesian prefix fail validation."""
+        with pytest.raises(ValidationError):
+            PayoutMethodRequest(method_type="ewallet", ewallet_provider="OVO", phone_number="12345")
+
+    def test_unsupported_ewallet_rejected(self):
+        """Providers outside the allow-list fail validation."""
+        with pytest.raises(ValidationError):
+            PayoutMethodRequest(method_type="ewallet", ewallet_provider="PAYPAL", phone_number="081234567890")
+
+
+class TestWithdrawalResponse:
+    """Test the withdrawal response DTO."""
+
+    def test_response_is_frozen_and_ignores_extra_fields(self):
+        """Stored documents may carry extra keys; the response drops them and is immutable."""
+        response = WithdrawalResponse(
+            id="w1",
+            user_id="u1",
+            amount_points=100,
+            status="pending",
+            created_at=datetime(2024, 1, 15, 10, 30),
+            method_type="ewallet",
+            ewallet_provider="OVO",
+            phone_number="081234567890",
+            admin_note="internal",
+        )
+
+        assert "admin_note" not in response.model_dump()
+        with pytest.raises(ValidationError):
+            response.status = "completed"
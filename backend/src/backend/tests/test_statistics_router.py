@@ -0,0 +1,93 @@
+"""Test statistics router functionality."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from ..models.statistics import StatisticsSummary
+from ..routers.auth import verify_token
+from ..routers.statistics import router
+from ..schemas.statistics import UserRankingResponse
+from ..services.statistics_service import bump_statistics_version
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def _summary(total_bottles: int) -> StatisticsSummary:
+    return StatisticsSummary(
+        total_bottles=total_bottles,
+        total_points=total_bottles * 5,
+        total_scans=total_bottles,
+        plastic_waste_diverted_kg=total_bottles * 0.025,
+        co2_emissions_saved_kg=total_bottles * 0.1,
+        bottles_this_month=total_bottles,
+        points_this_month=total_bottles * 5,
+        current_streak_days=1,
+        longest_streak_days=1,
+    )
+
+
+class TestPersonalStatisticsCaching:
+    """Test ETag revalidation on /statistics/personal."""
+
+    def test_etag_revalidation_and_scan_invalidation(self):
+        """Matching If-None-Match yields 304 until a new scan bumps the version."""
+        email = "stats@example.com"
+        payload = {"sub": str(ObjectId()), "email": email}
+        app.dependency_overrides[verify_token] = lambda: payload
+        mock_calculate = AsyncMock(side_effect=[_summary(3), _summary(4)])
+
+        try:
+            with patch("src.backend.routers.statistics.statistics_service.calculate_user_statistics", mock_calculate):
+                first = client.get("/statistics/personal")
+                etag = first.headers["etag"]
+                assert first.status_code == 200
+                assert first.json()["total_bottles"] == 3
+                assert first.json()["environmental_impact"]["bottles_equivalent"] == "3 botol plastik"
+
+                revalidated = client.get("/statistics/personal", headers={"If-None-Match": etag})
+                assert revalidated.status_code == 304
+                assert mock_calculate.await_count == 1
+
+                bump_statistics_version(email)
+                refreshed = client.get("/statistics/personal", headers={"If-None-Match": etag})
+                assert refreshed.status_code == 200
+                assert refreshed.headers["etag"] != etag
+                assert refreshed.json()["total_bottles"] == 4
+        finally:
+            app.dependency_overrides.clear()
+
+
+class TestLeaderboard:
+    """Test leaderboard serialisation."""
+
+    def test_public_leaderboard_ranks_and_serialises(self):
+        """Pipeline-ranked rows are serialised through the response model."""
+        rankings = [
+            {"user_id": "u1", "name": "A", "total_bottles": 9, "total_points": 45, "rank": 1},
+            {"user_id": "u2", "name": "B", "total_bottles": 4, "total_points": 20, "rank": 2},
+        ]
+
+        with patch("src.backend.routers.statistics.statistics_service.get_user_rankings", AsyncMock(return_value=rankings)):
+            response = client.get("/statistics/public/leaderboard")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [rank["rank"] for rank in body["rankings"]] == [1, 2]
+        assert set(body["rankings"][0]) == {"user_id", "name", "total_bottles", "total_points", "rank"}
+        assert body["total_participants"] == 2
+        assert body["user_rank"] is None
+
+    def test_ranking_rows_are_frozen(self):
+        """Ranking rows drop unknown keys and cannot be modified once built."""
+        row = UserRankingResponse(user_id="u1", name="A", total_bottles=9, total_points=45, rank=1, _id="a@example.com")
+
+        assert "_id" not in row.model_dump()
+        with pytest.raises(ValidationError):
+            row.rank = 2
@@ -1,11 +1,12 @@
 """Test transaction router functionality."""
 
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from bson import ObjectId
 
-from ..routers.transactions import router
+from ..routers.transactions import router, _resolve_user_id
 from ..models.transaction import TransactionResponse
 from ..services.transaction_service import TransactionService
 
@@ -201,3 +202,47 @@ class TestTransactionRouter:
         
         # Cleanup
         router.dependency_overrides.clear()
+
+
+class TestResolveUserId:
+    """Test user id resolution from the JWT payload."""
+
+    @pytest.mark.asyncio
+    async def test_sub_claim_skips_user_lookup(self):
+        """Tokens carrying ``sub`` should not touch the users collection."""
+        user_id = str(ObjectId())
+        with patch("src.backend.routers.transactions.ensure_connection", new_callable=AsyncMock) as mock_conn:
+            resolved = await _resolve_user_id({"sub": user_id, "email": "user@example.com"})
+
+        assert resolved == user_id
+        mock_conn.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_email_only_token_is_cached(self):
+        """Legacy email-only tokens are resolved once per worker."""
+        user_oid = ObjectId()
+        mock_db = MagicMock()
+        mock_db.users.find_one = AsyncMock(return_value={"_id": user_oid})
+        with patch("src.backend.routers.transactions.ensure_connection", new_callable=AsyncMock, return_value=mock_db):
+            first = await _resolve_user_id({"email": "legacy@example.com"})
+            second = await _resolve_user_id({"email": "legacy@example.com"})
+
+        assert first == second == str(user_oid)
+        mock_db.users.find_one.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_missing_claims_rejected(self):
+        """Payloads without ``sub`` or ``email`` are rejected with 401."""
+        with pytest.raises(HTTPException) as exc_info:
+            await _resolve_user_id({"email": None})
+
+        assert exc_info.value.status_code == 401
+
+
+def test_static_routes_precede_transaction_id_route():
+    """/transactions/summary and /count must not be shadowed by /{transaction_id}."""
+    paths = [route.path for route in router.routes]
+    param_index = paths.index("/api/transactions/{transaction_id}")
+
+    assert paths.index("/api/transactions/summary") < param_index
+    assert paths.index("/api/transactions/count") < param_index
@@ -1,11 +1,16 @@
 """Test transaction service functionality."""
 
 import pytest
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 from bson import ObjectId
 
 from ..services.transaction_service import TransactionServiceImpl
-from ..repositories.transaction_repository import MongoDBTransactionRepository
+from ..repositories.transaction_repository import (
+    MongoDBTransactionRepository,
+    decode_transaction_cursor,
+    encode_transaction_cursor,
+)
 from ..models.transaction import Transaction, TransactionCreate, TransactionResponse
 
 
@@ -133,7 +138,7 @@ class TestTransactionService:
         # Assert
         assert len(result) == 2
         assert all(isinstance(t, TransactionResponse) for t in result)
-        mock_repository.get_transactions_by_user_id.assert_called_once_with(user_id, limit, offset)
+        mock_repository.get_transactions_by_user_id.assert_called_once_with(user_id, limit, offset, None)
     
     async def test_get_user_transactions_invalid_limit_offset(self, transaction_service, mock_repository):
         """Test transaction retrieval with invalid limit/offset values."""
@@ -147,13 +152,13 @@ class TestTransactionService:
         result = await transaction_service.get_user_transactions(user_id, limit=-5, offset=0)
         
         # Assert - Should use default limit of 20
-        mock_repository.get_transactions_by_user_id.assert_called_with(user_id, 20, 0)
+        mock_repository.get_transactions_by_user_id.assert_called_with(user_id, 20, 0, None)
         
         # Act - Test invalid offset
         result = await transaction_service.get_user_transactions(user_id, limit=10, offset=-10)
         
         # Assert - Should use default offset of 0
-        mock_repository.get_transactions_by_user_id.assert_called_with(user_id, 10, 0)
+        mock_repository.get_transactions_by_user_id.assert_called_with(user_id, 10, 0, None)
     
     async def test_get_user_transaction_summary_success(self, transaction_service, mock_repository):
         """Test successful retrieval of user transaction summary."""
@@ -186,3 +191,21 @@ class TestTransactionService:
         # Assert
         assert result == mock_count
         mock_repository.get_user_transaction_count.assert_called_once_with(user_id)
+
+
+class TestTransactionCursor:
+    """Test keyset pagination cursor encoding."""
+
+    def test_cursor_round_trip(self):
+        """A cursor decodes back to the created_at/_id pair it was built from."""
+        transaction_id = ObjectId()
+        created_at = datetime(2024, 1, 15, 10, 0, 0)
+
+        cursor = encode_transaction_cursor(created_at.isoformat(), str(transaction_id))
+
+        assert decode_transaction_cursor(cursor) == (created_at, transaction_id)
+
+    def test_malformed_cursor_rejected(self):
+        """Garbage cursors raise ValueError instead of reaching the query."""
+        with pytest.raises(ValueError):
+            decode_transaction_cursor("not-a-cursor")
@@ -0,0 +1,302 @@
+"""Test WebSocket router functionality."""
+
+import asyncio
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+import orjson
+from bson import ObjectId
+from fastapi import FastAPI, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from ..routers.auth import verify_token
+from ..routers.ws import MAX_BROADCAST_BYTES, _handle_message, get_current_user_from_token, router
+from ..schemas.notification import NotificationResponse
+from ..services.ws_manager import ConnectionManager, current_timestamp, encode_message
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+class TestPublicWebSocket:
+    """Test the public WebSocket endpoint."""
+
+    def test_ping_fast_path_returns_pong(self):
+        """Heartbeat frames are answered with a JSON pong text frame."""
+        with client.websocket_connect("/ws/public") as websocket:
+            websocket.receive_text()  # welcome frame
+
+            for frame in ('{"type":"ping"}', "ping"):
+                websocket.send_text(frame)
+                assert orjson.loads(websocket.receive_text())["type"] == "pong"
+
+    def test_binary_ping_opcode_returns_pong(self):
+        """A single 0x01 byte is answered like a JSON ping."""
+        with client.websocket_connect("/ws/public") as websocket:
+            websocket.receive_text()
+
+            websocket.send_bytes(b"\x01")
+            assert orjson.loads(websocket.receive_text())["type"] == "pong"
+
+    def test_non_ping_message_is_echoed(self):
+        """Other message types still go through the JSON handler."""
+        with client.websocket_connect("/ws/public") as websocket:
+            websocket.receive_text()
+
+            websocket.send_text('{"type":"hello"}')
+            reply = orjson.loads(websocket.receive_text())
+
+            assert reply["type"] == "echo"
+            assert reply["data"] == {"type": "hello"}
+
+
+def test_websocket_routes_registered_once():
+    """Each WebSocket router path is served by exactly one handler."""
+    paths = [route.path for route in router.routes]
+
+    assert paths.count("/ws/status") == 1
+    assert paths.count("/ws/public") == 1
+    assert paths.count("/ws/notifications/{user_id}") == 1
+
+
+class TestWebSocketAuthCache:
+    """Test the verified-token cache used by the notification endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_reconnect_skips_user_lookup(self):
+        """A token seen before is served from cache without a DB round trip."""
+        user_oid = ObjectId()
+        payload = {"sub": str(user_oid), "email": "ws@example.com", "exp": int(time.time()) + 600}
+        mock_db = MagicMock()
+        mock_db.users.find_one = AsyncMock(return_value={"_id": user_oid, "email": "ws@example.com"})
+
+        with patch("src.backend.routers.ws.verify_jwt_token", return_value=payload) as mock_verify, \
+                patch("src.backend.routers.ws.ensure_connection", new_callable=AsyncMock, return_value=mock_db):
+            first = await get_current_user_from_token("token")
+            second = await get_current_user_from_token("token")
+
+        assert first is not None
+        assert second is first
+        mock_verify.assert_called_once()
+        mock_db.users.find_one.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_new_token_for_known_user_skips_user_lookup(self):
+        """A different token for an already-seen ``sub`` reuses the cached user."""
+        user_oid = ObjectId()
+        payload = {"sub": str(user_oid), "email": "ws2@example.com", "exp": int(time.time()) + 600}
+        mock_db = MagicMock()
+        mock_db.users.find_one = AsyncMock(return_value={"_id": user_oid, "email": "ws2@example.com"})
+
+        with patch("src.backend.routers.ws.verify_jwt_token", return_value=payload) as mock_verify, \
+                patch("src.backend.routers.ws.ensure_connection", new_callable=AsyncMock, return_value=mock_db):
+            first = await get_current_user_from_token("token-a")
+            second = await get_current_user_from_token("token-b")
+
+        assert second is first
+        assert mock_verify.call_count == 2
+        mock_db.users.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_status_is_rate_limited_per_connection():
+    """A second get_status inside the interval is answered with rate_limited."""
+    websocket = AsyncMock()
+    connection_manager = MagicMock()
+    connection_manager.get_connection_count.return_value = 1
+    connection_manager.get_user_count.return_value = 1
+    connection_manager.send_personal_frame = AsyncMock()
+
+    await _handle_message(websocket, '{"type":"get_status"}', "user-1", connection_manager)
+    await _handle_message(websocket, '{"type":"get_status"}', "user-1", connection_manager)
+
+    websocket.send_text.assert_not_awaited()
+    first, second = (orjson.loads(call.args[0]) for call in connection_manager.send_personal_frame.await_args_list)
+    assert first["type"] == "status_response"
+    assert (second["type"], second["message"]) == ("error", "rate_limited")
+    connection_manager.get_connection_count.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once_and_drops_failed_sockets():
+    """Broadcast queues one frame for every socket and disconnects the ones that fail."""
+    connection_manager = ConnectionManager()
+    healthy, broken = AsyncMock(), AsyncMock()
+
+    async def fail_on_broadcast(frame):
+        if "broadcast_notification" in frame:
+            raise RuntimeError("socket closed")
+
+    broken.send_text.side_effect = fail_on_broadcast
+    await connection_manager.connect(healthy, "user-1")
+    await connection_manager.connect(broken, "user-2")
+
+    await connection_manager.broadcast_notification({"title": "hello"})
+    await connection_manager.drain()
+
+    frame = healthy.send_text.await_args.args[0]
+    assert broken.send_text.await_args.args[0] is frame
+    assert orjson.loads(frame)["data"] == {"title": "hello"}
+    assert broken not in connection_manager.connection_users
+    assert healthy in connection_manager.connection_users
+
+
+class TestBroadcastEndpoint:
+    """Test the admin broadcast endpoint."""
+
+    def test_broadcast_requires_admin(self):
+        """Non-admin tokens are rejected before anything is sent."""
+        app.dependency_overrides[verify_token] = lambda: {"sub": "user-1", "role": "user"}
+        try:
+            response = client.post("/ws/broadcast", json={"message": "hi"})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 403
+
+    def test_oversized_broadcast_rejected(self):
+        """Payloads above the size cap are rejected with 413."""
+        app.dependency_overrides[verify_token] = lambda: {"sub": "admin-1", "role": "admin"}
+        try:
+            response = client.post("/ws/broadcast", json={"message": "x" * (MAX_BROADCAST_BYTES + 1)})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 413
+
+    def test_broadcast_size_cap_counts_utf8_bytes(self):
+        """Multi-byte characters count by their encoded size, not as single characters."""
+        app.dependency_overrides[verify_token] = lambda: {"sub": "admin-1", "role": "admin"}
+        try:
+            response = client.post("/ws/broadcast", json={"message": "é" * (MAX_BROADCAST_BYTES // 2)})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 413
+
+
+def test_encode_message_handles_datetimes_and_numpy():
+    """Naive datetimes are emitted as UTC and numpy scalars as plain numbers."""
+    frame = encode_message({"created_at": datetime(2024, 1, 15, 10, 0), "volume_ml": np.float64(600.5)})
+
+    assert orjson.loads(frame) == {"created_at": "2024-01-15T10:00:00+00:00", "volume_ml": 600.5}
+
+
+def test_current_timestamp_is_rendered_once_per_second():
+    """Frames built within one second share the same timestamp string."""
+    with patch("src.backend.services.ws_manager.time.time", return_value=1705314600.25):
+        first = current_timestamp()
+        assert current_timestamp() is first
+    with patch("src.backend.services.ws_manager.time.time", return_value=1705314601.0):
+        second = current_timestamp()
+
+    assert first == "2024-01-15T10:30:00"
+    assert second == "2024-01-15T10:30:01"
+
+
+@pytest.mark.asyncio
+async def test_fan_out_disconnects_stalled_socket():
+    """A socket whose write never completes is dropped after the send timeout."""
+    connection_manager = ConnectionManager()
+    stalled = AsyncMock()
+
+    async def never_completes(frame):
+        await asyncio.sleep(10)
+
+    stalled.send_text.side_effect = never_completes
+
+    with patch("src.backend.services.ws_manager.SEND_TIMEOUT_SECONDS", 0.01):
+        await connection_manager.connect(stalled, "user-1")
+        await connection_manager.drain()
+
+    assert stalled not in connection_manager.connection_users
+    await asyncio.gather(*connection_manager._closing)
+    stalled.close.assert_awaited_once_with(code=1013, reason="Too slow")
+
+
+@pytest.mark.asyncio
+async def test_slow_client_with_full_outbox_is_disconnected():
+    """Senders never block on a slow socket; overflowing its outbox drops it."""
+    connection_manager = ConnectionManager()
+    slow = AsyncMock()
+
+    with patch("src.backend.services.ws_manager.OUTBOX_MAX_FRAMES", 2):
+        await connection_manager.connect(slow, "user-1")
+        for _ in range(3):
+            await connection_manager.send_notification_to_user("user-1", {"title": "hello"})
+
+    assert slow not in connection_manager.connection_users
+    assert slow not in connection_manager.outboxes
+    await asyncio.gather(*connection_manager._closing)
+    slow.close.assert_awaited_once_with(code=1013, reason="Too slow")
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_every_batch():
+    """Audiences larger than one batch are all sent the same frame."""
+    connection_manager = ConnectionManager()
+    sockets = [AsyncMock() for _ in range(5)]
+    for index, websocket in enumerate(sockets):
+        await connection_manager.connect(websocket, f"user-{index}")
+
+    with patch("src.backend.services.ws_manager.BROADCAST_BATCH_SIZE", 2):
+        await connection_manager.broadcast_notification({"title": "hello"})
+    await connection_manager.drain()
+
+    # One connection_established frame plus the broadcast
+    assert all(websocket.send_text.await_count == 2 for websocket in sockets)
+
+
+@pytest.mark.asyncio
+async def test_notification_model_is_embedded_without_revalidation():
+    """Response models are serialised once and spliced into the frame."""
+    connection_manager = ConnectionManager()
+    websocket = AsyncMock()
+    await connection_manager.connect(websocket, "user-1")
+    notification = NotificationResponse.model_construct(
+        id="n1", user_id="user-1", title="Hi", message="Reward", notification_type="reward",
+        is_read=False, created_at=datetime(2024, 1, 15, 10, 30), priority=2,
+    )
+
+    await connection_manager.send_notification_to_user("user-1", notification)
+    await connection_manager.drain()
+
+    frame = orjson.loads(websocket.send_text.await_args.args[0])
+    assert frame["type"] == "notification"
+    assert frame["data"] == orjson.loads(notification.model_dump_json())
+
+
+def test_status_endpoint_response_shape():
+    """/ws/status is serialised through its response model."""
+    response = client.get("/ws/status")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"total_connections", "total_users", "status"}
+
+
+def test_notifications_socket_closed_without_token():
+    """Clients that never send their token are closed after the auth timeout."""
+    with patch("src.backend.routers.ws.AUTH_TIMEOUT_SECONDS", 0.05):
+        with client.websocket_connect("/ws/notifications/user-1") as websocket:
+            websocket.receive_text()  # connecting frame
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                websocket.receive_text()
+
+    assert exc_info.value.code == 1008
+
+
+def test_invalid_token_closes_with_reason_only():
+    """Auth failures are reported in the close frame without a separate error frame."""
+    with patch("src.backend.routers.ws.get_current_user_from_token", AsyncMock(return_value=None)):
+        with client.websocket_connect("/ws/notifications/user-1") as websocket:
+            websocket.receive_text()  # connecting frame
+            websocket.send_text('{"token": "bad"}')
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                websocket.receive_text()
+
+    assert exc_info.value.code == 1008
+    assert exc_info.value.reason == "Invalid token"